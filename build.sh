@@ -1 +1 @@
-python3 src/main.py /bdev-ssg/ ./docs
+python3 src/main.py /bdev-ssg/ ./docs https://blittle1996.github.io
@@ -0,0 +1,193 @@
+import json
+import os
+import struct
+from typing import BinaryIO
+
+from cache import JsonCache, content_hash, file_hash
+from output import Output
+from urls import URL_MARK
+
+ASSETS_VERSION = "2"
+MANIFEST_NAME = "asset-manifest.json"
+# how much of the content hash goes in a fingerprinted file name
+HASH_LENGTH = 10
+
+# the exact form TextNode writes images in. text content has < escaped, so
+# this can't show up anywhere else in a rendered page
+_IMG_START = '<img src="'
+
+type Size = tuple[int, int]
+
+
+# width and height from the header of a png, gif or jpeg, without decoding any pixels.
+# None for anything else
+def read_image_size(f: BinaryIO) -> Size | None:
+    head = f.read(26)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", head[16:24])
+        return width, height
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", head[6:10])
+        return width, height
+    if head.startswith(b"\xff\xd8"):
+        f.seek(2)
+        return _jpeg_size(f)
+    return None
+
+
+# start of frame markers hold the size, everything before them is skipped by length
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE}
+
+
+def _jpeg_size(f: BinaryIO) -> Size | None:
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # markers can be padded with extra 0xff bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD9:
+            continue  # markers without a length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if code in _JPEG_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">xHH", data)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+# finds the files behind urls like /images/cat.png in the static directory, and works
+# out their image sizes and (optionally) content hashed names. file hashes are cached
+# by path, mtime and size, and image sizes by the file's hash, so neither is worked
+# out again for files that haven't changed
+class Assets:
+    def __init__(
+        self,
+        static_dir: str,
+        cache: JsonCache | None = None,
+        hash_names: bool = False,
+    ) -> None:
+        self.static_dir = static_dir
+        self.cache = cache if cache is not None else JsonCache(None, ASSETS_VERSION)
+        self.hash_names = hash_names
+        # url -> fingerprinted url, for every asset renamed this build
+        self.renamed: dict[str, str] = {}
+
+    def path_of(self, url: str) -> str | None:
+        if not url.startswith("/") or url.startswith("//"):
+            return None  # not ours, i.e. https://... or a relative link
+        path = os.path.normpath(os.path.join(self.static_dir, url.lstrip("/")))
+        if not path.startswith(os.path.normpath(self.static_dir) + os.path.sep):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def url_of(self, path: str) -> str:
+        rel_path = os.path.relpath(path, self.static_dir)
+        return "/" + rel_path.replace(os.path.sep, "/")
+
+    def hash_of(self, path: str) -> str:
+        st = os.stat(path)
+        key = f"{path}:{st.st_mtime_ns}:{st.st_size}"
+        h = self.cache.get(key)
+        if h is None:
+            h = file_hash(path)
+            self.cache.set(key, h)
+        return h
+
+    def image_size(self, url: str) -> Size | None:
+        path = self.path_of(url)
+        if path is None:
+            return None
+        key = self.hash_of(path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return (cached[0], cached[1]) if cached else None
+        with open(path, "rb") as f:
+            size = read_image_size(f)
+        self.cache.set(key, list(size) if size else [])
+        return size
+
+    # /images/cat.png -> /images/cat.0123456789.png when hash_names is on
+    def asset_url(self, url: str) -> str:
+        if not self.hash_names:
+            return url
+        hashed = self.renamed.get(url)
+        if hashed is not None:
+            return hashed
+        path = self.path_of(url)
+        if path is None:
+            return url
+        stem, ext = os.path.splitext(url)
+        hashed = f"{stem}.{self.hash_of(path)[:HASH_LENGTH]}{ext}"
+        self.renamed[url] = hashed
+        return hashed
+
+    # called by copy_dir for every static file it copies into dest_dir,
+    # adds the fingerprinted copy next to it when hash_names is on
+    def copy_fingerprinted(
+        self, path: str, dest_dir: str, output: Output | None = None
+    ) -> None:
+        if not self.hash_names:
+            return
+        hashed = self.asset_url(self.url_of(path))
+        (output or Output()).copy(
+            path, os.path.join(dest_dir, hashed.rsplit("/", 1)[-1]), self.hash_of(path)
+        )
+
+    # same as copy_fingerprinted, for files copy_dir changes on the way (i.e. minified
+    # css). the name is from the hash of data, as that's what gets served
+    def write_fingerprinted(
+        self,
+        url: str,
+        data: str | bytes,
+        dest_dir: str,
+        output: Output | None = None,
+    ) -> None:
+        if not self.hash_names:
+            return
+        stem, ext = os.path.splitext(url)
+        hashed = f"{stem}.{content_hash(data)[:HASH_LENGTH]}{ext}"
+        self.renamed[url] = hashed
+        (output or Output()).write(
+            os.path.join(dest_dir, hashed.rsplit("/", 1)[-1]), data
+        )
+
+    # url -> fingerprinted url for everything renamed, for tools outside the build
+    def write_manifest(self, dest_root: str, output: Output | None = None) -> None:
+        (output or Output()).write(
+            os.path.join(dest_root, MANIFEST_NAME),
+            json.dumps(dict(sorted(self.renamed.items())), indent=2),
+        )
+
+    # adds width, height and loading="lazy" to every image in rendered page html,
+    # urls can be marked or not
+    def rewrite_images(self, html: str) -> str:
+        if _IMG_START not in html:
+            return html
+        buf: list[str] = []
+        i = 0
+        while (start := html.find(_IMG_START, i)) != -1:
+            src_start = start + len(_IMG_START)
+            src_end = html.index('"', src_start)
+            tag_end = html.index(">", src_end)
+            url = html[src_start:src_end].strip(URL_MARK)
+            buf.append(html[i:start])
+            buf.append(html[start:tag_end])
+            size = self.image_size(url)
+            if size:
+                buf.append(f' width="{size[0]}" height="{size[1]}"')
+            buf.append(' loading="lazy">')
+            i = tag_end + 1
+        buf.append(html[i:])
+        return "".join(buf)
@@ -0,0 +1,263 @@
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from blocknode import Document
+from enums import TextType
+from htmlnode import HTMLNode
+from mdparser import (
+    fragment_cache,
+    markdown_to_html,
+    markdown_to_html_fast,
+    markdown_to_html_node,
+    render_many,
+    render_markdown,
+)
+from nodepool import NodePool
+from textnode import TextNode
+from treecache import dump_document, load_document
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
+
+# tiny benchmark harness, run with ./bench.sh [name ...]
+# every benchmark prints a single line so runs can be diffed over time
+
+
+def rate(fn: Callable[[], int], min_seconds: float = 0.5) -> float:
+    # calls fn until at least min_seconds have passed, fn returns how many items it handled
+    items = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        items += fn()
+        elapsed = time.perf_counter() - start
+    return items / elapsed
+
+
+def report(name: str, value: float, unit: str):
+    print(f"{name:<32} {value:>14,.0f} {unit}")
+
+
+def bench_text_to_html_node():
+    nodes = [
+        TextNode("plain text"),
+        TextNode("bold", TextType.BOLD),
+        TextNode("italic", TextType.ITALIC),
+        TextNode("code", TextType.CODE),
+        TextNode("link", TextType.LINK, "/somewhere"),
+        TextNode("image", TextType.IMAGE, "/images/cat.png"),
+    ] * 1000
+
+    def run() -> int:
+        for n in nodes:
+            n.to_html_node()
+        return len(nodes)
+
+    report("text_to_html_node", rate(run), "nodes/s")
+
+
+def read_corpus() -> list[str]:
+    docs = []
+    for dirpath, _dirs, files in os.walk(CONTENT_DIR):
+        for f in files:
+            with open(os.path.join(dirpath, f)) as mdf:
+                docs.append(mdf.read())
+    return docs
+
+
+def bench_render():
+    docs = read_corpus()
+
+    def run(render: Callable[[str], str]) -> Callable[[], int]:
+        def go() -> int:
+            for d in docs:
+                render(d)
+            return len(docs)
+
+        return go
+
+    report("render (tree)", rate(run(markdown_to_html)), "pages/s")
+    report("render (fast)", rate(run(markdown_to_html_fast)), "pages/s")
+
+
+def bench_fragment_cache():
+    # a big reference page where one paragraph gets edited between renders
+    blocks = [f"paragraph {i} with **bold** and a [link](/{i})" for i in range(5000)]
+    original = "# reference\n\n" + "\n\n".join(blocks)
+    edits = 0
+
+    def cold() -> int:
+        render_markdown(original)
+        return 1
+
+    cache = fragment_cache()
+    render_markdown(original, cache)
+
+    def warm() -> int:
+        nonlocal edits
+        edits += 1
+        render_markdown(original.replace("paragraph 42 ", f"edit {edits} "), cache)
+        return 1
+
+    report("5000 blocks (no cache)", rate(cold), "renders/s")
+    report("5000 blocks (one edit, cached)", rate(warm), "renders/s")
+
+
+def bench_tree_cache():
+    # the biggest page we have, and a reference page far bigger than any of them
+    biggest = max(read_corpus(), key=len)
+    blocks = [f"paragraph {i} with **bold** and a [link](/{i})" for i in range(5000)]
+    reference = "# reference\n\n" + "\n\n".join(blocks)
+
+    for name, md in [("biggest page", biggest), ("5000 blocks", reference)]:
+        data = dump_document(Document(md))
+
+        def parse() -> int:
+            Document(md)
+            return 1
+
+        def load() -> int:
+            load_document(data)
+            return 1
+
+        report(f"{name} (parse)", rate(parse), "docs/s")
+        report(f"{name} (load, {len(data):,} bytes)", rate(load), "docs/s")
+
+
+def bench_node_pool():
+    # boilerplate heavy pages: the same nav on every page, around a short body
+    nav = "\n".join(f"- [section {i}](/section/{i}/)" for i in range(30))
+    docs = [f"{nav}\n\n# page {i}\n\nsome **body** text {i}" for i in range(300)]
+
+    def build(pool: NodePool | None) -> tuple[list[HTMLNode], int]:
+        tracemalloc.start()
+        trees = [markdown_to_html_node(d, pool) for d in docs]
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return trees, size
+
+    for name, pool in [("plain", None), ("interned", NodePool())]:
+        trees, size = build(pool)
+
+        def serialize() -> int:
+            for t in trees:
+                t.to_html()
+            return len(trees)
+
+        report(f"300 trees ({name})", size / 1024, "KiB")
+        report(f"to_html ({name})", rate(serialize), "pages/s")
+
+
+def bench_render_many():
+    # every doc is different, but most of their blocks are shared with others
+    docs = [f"{d}\n\npage {i}" for i, d in enumerate(read_corpus() * 100)]
+
+    def serial() -> int:
+        for d in docs:
+            markdown_to_html(d)
+        return len(docs)
+
+    def batch(workers: int, chunksize: int = 16) -> Callable[[], int]:
+        return lambda: sum(1 for _ in render_many(docs, workers, chunksize))
+
+    procs = max(os.cpu_count() or 1, 2)  # at least 2, for an actual pool
+    report("serial markdown_to_html", rate(serial), "pages/s")
+    report("render_many (in process)", rate(batch(1)), "pages/s")
+    report(f"render_many ({procs} procs)", rate(batch(procs)), "pages/s")
+    report(f"render_many ({procs} procs, chunk 1)", rate(batch(procs, 1)), "pages/s")
+
+
+# the same documents as bench_render_many, on threads that share one fragment cache
+# instead of a process each with its own. threads only run in parallel on a free
+# threaded build, with the gil they're taking turns
+def bench_threads():
+    docs = [f"{d}\n\npage {i}" for i, d in enumerate(read_corpus() * 100)]
+    workers = max(os.cpu_count() or 1, 2)
+    gil = "gil" if getattr(sys, "_is_gil_enabled", lambda: True)() else "no gil"
+
+    def threads(n: int) -> int:
+        cache = fragment_cache()
+        with ThreadPoolExecutor(n) as pool:
+            return sum(1 for _ in pool.map(lambda d: render_markdown(d, cache), docs))
+
+    def procs() -> int:
+        return sum(1 for _ in render_many(docs, workers))
+
+    report("1 thread, shared cache", rate(lambda: threads(1)), "pages/s")
+    report(
+        f"{workers} threads, shared cache ({gil})",
+        rate(lambda: threads(workers)),
+        "pages/s",
+    )
+    report(f"render_many ({workers} procs)", rate(procs), "pages/s")
+
+
+# what main.py render may spend importing, see bench_startup
+RENDER_IMPORT_BUDGET_US = 15_000
+
+
+# a one off render the way watch hooks run it, a new interpreter per file. the
+# interpreter's own startup is there to compare against, it isn't ours to cut
+def bench_startup():
+    main_py = os.path.join(os.path.dirname(__file__), "main.py")
+    page = os.path.join(CONTENT_DIR, "index.md")
+
+    def wall(*args: str) -> float:
+        best = float("inf")
+        for _ in range(10):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, *args], check=True, stdout=subprocess.DEVNULL
+            )
+            best = min(best, time.perf_counter() - start)
+        return best * 1e6
+
+    # -X importtime lists every import, nested ones indented under what imported
+    # them. the top level ones after site are main's
+    lines = subprocess.run(
+        [sys.executable, "-X", "importtime", main_py, "render", page],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr.splitlines()
+    entries = [line.split("|") for line in lines if line.startswith("import time:")]
+    names = [name.rstrip() for _self, _cumulative, name in entries]
+    start = names.index(" site") + 1 if " site" in names else len(entries)
+    imports = sum(
+        int(cumulative)
+        for _self, cumulative, name in entries[start:]
+        if not name.startswith("  ")
+    )
+
+    report("python -c pass", wall("-c", "pass"), "us")
+    report("main.py render index.md", wall(main_py, "render", page), "us")
+    over = " OVER BUDGET" if imports > RENDER_IMPORT_BUDGET_US else ""
+    report("render imports", imports, f"us (budget {RENDER_IMPORT_BUDGET_US:,}){over}")
+
+
+BENCHMARKS: dict[str, Callable[[], None]] = {
+    "text_to_html_node": bench_text_to_html_node,
+    "render": bench_render,
+    "fragment_cache": bench_fragment_cache,
+    "tree_cache": bench_tree_cache,
+    "node_pool": bench_node_pool,
+    "render_many": bench_render_many,
+    "threads": bench_threads,
+    "startup": bench_startup,
+}
+
+
+def main():
+    _script, *names = sys.argv
+    for name in names or BENCHMARKS.keys():
+        if name not in BENCHMARKS:
+            raise ValueError(f"unknown benchmark: {name}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
 from functools import reduce
+from typing import IO, Iterator, NamedTuple
 from enums import BlockType
-from htmlnode import ParentNode
+from funcs import unique_slug
+from htmlnode import EMPTY_PROPS, ParentNode, escape
 from textnode import TextNode, text_to_nodes
+from urls import UrlResolver, keep_url
 
 type BlockChildren = list[list[TextNode]]
 
+# looked up once per block instead of matching on the type every time
+_BLOCK_TAGS: dict[BlockType, str] = {
+    BlockType.PARAGRAPH: "p",
+    BlockType.QUOTE: "blockquote",
+    BlockType.CODE: "code",
+    BlockType.ORDERED_LIST: "ol",
+    BlockType.UNORDERED_LIST: "ul",
+}
+_HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+# position is the index of the heading's block in the document,
+# slug is the id given to the heading element
+class Heading(NamedTuple):
+    level: int
+    text: str
+    position: int
+    slug: str
+
 
 class BlockNode:
     def __init__(self, text: str) -> None:
@@ -12,8 +34,33 @@ class BlockNode:
         self.text = text
         self.cleaned_text = self.__strip_markdown(text)
         self.children: BlockChildren = []
+        self.id: str | None = None  # set by Document for headings
+        # 1-6 for headings, 0 for everything else
+        self.level = 0
+        if self.type is BlockType.HEADING:
+            self.level = self.__get_heading_level()
         self.__init_children()
 
+    # a block put back together from parts that were already parsed (see treecache.py)
+    @classmethod
+    def restore(
+        cls,
+        type: BlockType,
+        text: str,
+        cleaned_text: str,
+        children: BlockChildren,
+        level: int,
+        id: str | None,
+    ) -> "BlockNode":
+        block = cls.__new__(cls)
+        block.type = type
+        block.text = text
+        block.cleaned_text = cleaned_text
+        block.children = children
+        block.level = level
+        block.id = id
+        return block
+
     def __init_children(self):
         # new lines will be turned into a space instead!
         lines = [self.cleaned_text.replace("\n", " ")]
@@ -33,11 +80,33 @@ class BlockNode:
             self.children = list(map(text_to_nodes, lines))
 
     def to_html_node(self) -> ParentNode:
-        node = ParentNode(self.get_tag(), self.__get_child_html_nodes())
+        props = {"id": self.id} if self.id else EMPTY_PROPS
+        node = ParentNode(self.get_tag(), self.__get_child_html_nodes(), props)
         if self.type == BlockType.CODE:
             node = ParentNode("pre", [node])
         return node
 
+    # appends the html for this block to buf, same output as to_html_node().to_html()
+    def write_html(self, buf: list[str], resolve: UrlResolver = keep_url) -> None:
+        tag = self.get_tag()
+        if self.type == BlockType.CODE:
+            buf.append("<pre>")
+        if self.id:
+            buf.append(f'<{tag} id="{escape(self.id)}">')
+        else:
+            buf.append(f"<{tag}>")
+        is_list = self.type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST)
+        for line in self.children:
+            if is_list:
+                buf.append("<li>")
+            for node in line:
+                node.write_html(buf, resolve)
+            if is_list:
+                buf.append("</li>")
+        buf.append(f"</{tag}>")
+        if self.type == BlockType.CODE:
+            buf.append("</pre>")
+
     def __get_child_html_nodes(self):
         lines_as_html_nodes = list(
             map(
@@ -59,23 +128,15 @@ class BlockNode:
         return flattened_list
 
     def get_tag(self) -> str:
-        match self.type:
-            case BlockType.PARAGRAPH:
-                return "p"
-            case BlockType.QUOTE:
-                return "blockquote"
-            case BlockType.CODE:
-                return "code"
-            case BlockType.HEADING:
-                return self.__get_heading_level()
-            case BlockType.ORDERED_LIST:
-                return "ol"
-            case BlockType.UNORDERED_LIST:
-                return "ul"
-            case _:
-                return "div"
+        if self.type is BlockType.HEADING:
+            return _HEADING_TAGS[self.level - 1]
+        return _BLOCK_TAGS.get(self.type, "div")
 
-    def __get_heading_level(self):
+    # the text without any markdown, i.e. "# **hi** there" is "hi there"
+    def plain_text(self) -> str:
+        return " ".join("".join(n.text for n in line) for line in self.children)
+
+    def __get_heading_level(self) -> int:
         if self.type is not BlockType.HEADING:
             raise ValueError(
                 "__get_heading_level must be called on HEADING block types"
@@ -84,9 +145,9 @@ class BlockNode:
         for c in self.text:
             if c != "#":
                 break
-            # h6 is the smallest heading
-            count = min(6, count + 1)
-        return f"h{count}"
+            count += 1
+        # h6 is the smallest heading
+        return min(6, count)
 
     def __eq__(self, target: object, /) -> bool:
         if not isinstance(target, BlockNode):
@@ -119,14 +180,67 @@ class BlockNode:
 
 
 # turns the whole md document into a list of strings. Deletes extra whitespace, sorry
+def split_blocks(md: str) -> list[str]:
+    return list(map(lambda s: s.strip(), md.split("\n\n")))
+
+
+# the same pieces as md.split("\n\n"), for a file read chunk_size chars at a time, so
+# only the block being read is ever held in memory (unstripped, unlike split_blocks).
+# start is anything already read off the front of f, i.e. by read_front_matter_stream
+def read_blocks(
+    f: IO[str], chunk_size: int = 1 << 16, start: str = ""
+) -> Iterator[str]:
+    pending: list[str] = [start] if start else []  # chunks of the block being read
+    while chunk := f.read(chunk_size):
+        # a long block is only joined up once it ends, not once per chunk
+        straddles = chunk[0] == "\n" and pending and pending[-1].endswith("\n")
+        if "\n\n" not in chunk and not straddles:
+            pending.append(chunk)
+            continue
+        *pieces, rest = ("".join(pending) + chunk).split("\n\n")
+        yield from pieces
+        pending = [rest]
+    yield "".join(pending)
+
+
 def text_to_blocks(md: str) -> list[BlockNode]:
-    # looks awful
-    return list(
-        filter(
-            # gotta have some lines
-            lambda b: len(b.children) > 0
-            # and those lines better not be empty
-            and len(b.children[0]) > 0,
-            list(map(lambda s: BlockNode(s.strip()), md.split("\n\n"))),
-        )
-    )
+    return Document(md).blocks
+
+
+# the parsed blocks of a markdown document. headings are recorded while the blocks
+# are built, so the title and outline don't need a search through the html afterwards
+class Document:
+    def __init__(self, md: str) -> None:
+        self.blocks: list[BlockNode] = []
+        self.headings: list[Heading] = []
+        self.title: str | None = None  # text of the first h1
+        slugs: dict[str, int] = {}
+        for text in split_blocks(md):
+            block = BlockNode(text)
+            if not has_content(block):
+                continue
+            if block.level > 0:
+                heading_text = block.plain_text()
+                block.id = unique_slug(heading_text, slugs)
+                heading = Heading(block.level, heading_text, len(self.blocks), block.id)
+                self.headings.append(heading)
+                if heading.level == 1 and self.title is None:
+                    self.title = heading.text
+            self.blocks.append(block)
+
+    @classmethod
+    def restore(
+        cls, blocks: list[BlockNode], headings: list[Heading], title: str | None
+    ) -> "Document":
+        doc = cls.__new__(cls)
+        doc.blocks = blocks
+        doc.headings = headings
+        doc.title = title
+        return doc
+
+
+# empty blocks don't render anything
+def has_content(block: BlockNode) -> bool:
+    # gotta have some lines
+    # and those lines better not be empty
+    return len(block.children) > 0 and len(block.children[0]) > 0
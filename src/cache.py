@@ -0,0 +1,82 @@
+import json
+import os
+from typing import Any
+
+# hashlib is imported when something is first hashed, as it loads all of openssl.
+# a render without caches never needs it
+_blake2b: Any = None
+
+
+def _load_blake2b() -> Any:
+    global _blake2b
+    from hashlib import blake2b
+
+    _blake2b = blake2b
+    return blake2b
+
+
+def content_hash(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode()
+    return (_blake2b or _load_blake2b())(data, digest_size=16).hexdigest()
+
+
+# same as content_hash, but for a file's bytes. reads in chunks so big files are fine
+def file_hash(path: str) -> str:
+    h = (_blake2b or _load_blake2b())(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# a key -> json value store kept in memory and persisted to a single file between builds.
+# entries written by a different version are thrown away on load, and only entries that
+# were used since loading get saved, so deleted/edited content doesn't pile up forever.
+# a long running process (like a watch loop) can just keep reusing the same instance
+class JsonCache:
+    def __init__(self, path: str | None = None, version: str = "") -> None:
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.__entries: dict[str, Any] = {}
+        self.__used: set[str] = set()
+        self.__load()
+
+    def get(self, key: str) -> Any | None:
+        value = self.__entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__used.add(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.__entries[key] = value
+        self.__used.add(key)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.__entries = {k: v for k, v in self.__entries.items() if k in self.__used}
+        os.makedirs(os.path.dirname(self.path) or ".", 0o755, True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "entries": self.__entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def __load(self) -> None:
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return  # a broken cache is just an empty cache
+        if isinstance(data, dict) and data.get("version") == self.version:
+            self.__entries = data.get("entries", {})
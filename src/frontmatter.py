@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from io import StringIO
+from typing import IO
+
+type FrontMatter = dict[str, str | int | bool]
+
+# yaml-ish front matter uses --- and key: value, toml-ish uses +++ and key = value
+#
+# ---
+# title: Why Tom Bombadil Was a Mistake
+# date: 2024-05-01
+# draft: true
+# ---
+_DELIMITERS = {"---": ":", "+++": "="}
+
+
+class FrontMatterError(ValueError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+# reads the front matter at the top of a markdown file, leaving f right at the start
+# of the body. nothing past the closing delimiter is read, so listing every page's
+# metadata doesn't mean reading every page
+def read_front_matter(f: IO[str]) -> FrontMatter:
+    start = f.tell()
+    meta, read = read_front_matter_stream(f)
+    if read:
+        f.seek(start)  # no front matter, the whole file is the body
+    return meta
+
+
+# same as read_front_matter, for input that can't be rewound (i.e. stdin). also
+# returns what was read of the body, the first line when there's no front matter
+def read_front_matter_stream(f: IO[str]) -> tuple[FrontMatter, str]:
+    first = f.readline()
+    separator = _DELIMITERS.get(first.strip())
+    if separator is None:
+        return {}, first
+
+    meta: FrontMatter = {}
+    for line_number, line in enumerate(iter(f.readline, ""), 2):
+        line = line.strip()
+        if line == first.strip():
+            return meta, ""
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition(separator)
+        if not sep or not key.strip():
+            raise FrontMatterError(line_number, f"expected 'key{separator} value'")
+        meta[key.strip()] = _parse_value(value.strip())
+    raise FrontMatterError(
+        1, f"front matter starting with {first.strip()} is never closed"
+    )
+
+
+def split_front_matter(text: str) -> tuple[FrontMatter, str]:
+    f = StringIO(text)
+    meta = read_front_matter(f)
+    return meta, f.read()
+
+
+def _parse_value(value: str) -> str | int | bool:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value in ("true", "false"):
+        return value == "true"
+    if value.isdigit():
+        return int(value)
+    return value
+
+
+# the date field as a unix timestamp, dates without a timezone are taken as UTC
+def front_matter_date(meta: FrontMatter) -> float | None:
+    value = meta.get("date")
+    if not isinstance(value, str):
+        return None
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
@@ -25,3 +25,28 @@ def earliest_index_in(substrs: Sequence[str], search: str) -> tuple[str, int]:
             earliest = (s, index)
 
     return earliest
+
+
+# turns text into something usable as an html id, i.e. "Why Tom? (part 2)" -> "why-tom-part-2"
+def slugify(text: str) -> str:
+    slug: list[str] = []
+    for c in text.lower():
+        if c.isalnum():
+            slug.append(c)
+        elif c in " -_" and slug and slug[-1] != "-":
+            slug.append("-")
+    return "".join(slug).strip("-") or "section"
+
+
+# like slugify, but adds -1, -2, ... for slugs already in seen. seen maps every
+# slug handed out to the next suffix to try, so repeats don't rescan from 1
+def unique_slug(text: str, seen: dict[str, int]) -> str:
+    base = slugify(text)
+    n = seen.get(base, 0)
+    slug = base if n == 0 else f"{base}-{n}"
+    while slug in seen:
+        n += 1
+        slug = f"{base}-{n}"
+    seen[base] = n + 1
+    seen.setdefault(slug, 1)
+    return slug
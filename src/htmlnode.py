@@ -1,37 +1,60 @@
-from typing import Sequence
+from types import MappingProxyType
+from typing import Mapping, Sequence
+
+from urls import URL_ATTRIBUTES, URL_MARK, UrlResolver, keep_url
 
 
 type Optional[T] = T | None
 
+# shared, read-only props for nodes without attributes. most nodes have none,
+# so they all point here instead of each carrying their own empty dict
+EMPTY_PROPS: Mapping[str, str] = MappingProxyType({})
+
+
+# for text content or attribute content, anything writing html directly should use this
+# so it matches what the node tree would have produced
+def escape(text: str) -> str:
+    if URL_MARK in text:
+        text = text.replace(URL_MARK, "\ufffd")  # same as a browser would
+    return text.replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
+
 
 class HTMLNode:
+    # only known for interned nodes (see nodepool.py), which can't change after creation
+    structural_hash: Optional[int] = None
+
     def __init__(
         self,
         tag: Optional[str] = None,
         value: Optional[str] = None,
-        children: Sequence["HTMLNode"] = [],
-        props: dict[str, str] = {},
+        children: Sequence["HTMLNode"] = (),
+        props: Mapping[str, str] = EMPTY_PROPS,
     ):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    # overriden by implementing classes
-    def to_html(self) -> str:
+    # overriden by implementing classes. resolve is run over every href and src
+    def to_html(self, resolve: UrlResolver = keep_url) -> str:
         raise NotImplementedError()
 
-    def props_to_html(self) -> str:
-        return " ".join(map(lambda v: self.__prop_to_html(*v), self.props.items()))
+    def props_to_html(self, resolve: UrlResolver = keep_url) -> str:
+        return " ".join(
+            map(lambda v: self.__prop_to_html(*v, resolve), self.props.items())
+        )
 
-    def __prop_to_html(self, key: str, value: str) -> str:
+    def __prop_to_html(self, key: str, value: str, resolve: UrlResolver) -> str:
         if self.tag == "img" and key == "href":
             key = "src"
-        return f'{key}="{self._escape_special_chars(value)}"'
+        value = self._escape_special_chars(value)
+        if key in URL_ATTRIBUTES:
+            value = resolve(value)
+        return f'{key}="{value}"'
 
     # for text content or attribute content of a html node, not intended for external use
     def _escape_special_chars(self, text: str) -> str:
-        return text.replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
+        return escape(text)
 
     # DFS for tag
     def find(self, tag: str) -> "HTMLNode | None":
@@ -43,17 +66,31 @@ class HTMLNode:
                 return found
         return None
 
+    # same DFS order as find, with a stack of its own rather than recursion, so a
+    # deeply nested tree neither copies the matches at every level nor hits the
+    # recursion limit
     def find_all(self, tag: str) -> list["HTMLNode"]:
-        matches = []
-        if self.tag == tag:
-            matches.append(self)
-        for c in self.children:
-            matches = matches + c.find_all(tag)
+        matches: list[HTMLNode] = []
+        stack: list[HTMLNode] = [self]
+        while stack:
+            node = stack.pop()
+            if node.tag == tag:
+                matches.append(node)
+            stack.extend(reversed(node.children))
         return matches
 
     def __eq__(self, rhs: object, /) -> bool:
+        if self is rhs:
+            return True
         if not isinstance(rhs, type(self)):
             return False
+        # different structural hashes can't be equal, no need to look any deeper
+        if (
+            self.structural_hash is not None
+            and rhs.structural_hash is not None
+            and self.structural_hash != rhs.structural_hash
+        ):
+            return False
 
         tag_eq = self.tag == rhs.tag
         value_eq = self.value == rhs.value
@@ -91,16 +128,16 @@ class LeafNode(HTMLNode):
         self,
         tag: Optional[str],
         value: str,
-        props: dict[str, str] = {},
+        props: Mapping[str, str] = EMPTY_PROPS,
     ):
-        super().__init__(tag, value, [], props)
+        super().__init__(tag, value, (), props)
         self.value = value  # for type system
 
-    def to_html(self) -> str:
+    def to_html(self, resolve: UrlResolver = keep_url) -> str:
         cleaned_value = self._escape_special_chars(self.value)
         if not self.tag:
             return cleaned_value
-        html = f"<{self.tag} {self.props_to_html()}>{cleaned_value}</{self.tag}>"
+        html = f"<{self.tag} {self.props_to_html(resolve)}>{cleaned_value}</{self.tag}>"
         if len(self.props) == 0:
             html = html.replace(" >", ">", 1)
         if self.tag in self.self_closing_tags:
@@ -112,13 +149,16 @@ class LeafNode(HTMLNode):
 
 class ParentNode(HTMLNode):
     def __init__(
-        self, tag: str, children: Sequence[HTMLNode] = [], props: dict[str, str] = {}
+        self,
+        tag: str,
+        children: Sequence[HTMLNode] = (),
+        props: Mapping[str, str] = EMPTY_PROPS,
     ):
         super().__init__(tag, None, children, props)
         self.tag = tag
 
-    def to_html(self):
-        child_html = "".join(map(lambda n: n.to_html(), self.children))
+    def to_html(self, resolve: UrlResolver = keep_url):
+        child_html = "".join(map(lambda n: n.to_html(resolve), self.children))
         if len(self.props) == 0:
             return f"<{self.tag}>{child_html}</{self.tag}>"
-        return f"<{self.tag} {self.props_to_html()}>{child_html}</{self.tag}>"
+        return f"<{self.tag} {self.props_to_html(resolve)}>{child_html}</{self.tag}>"
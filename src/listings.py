@@ -0,0 +1,190 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple
+
+from cache import JsonCache, content_hash
+from htmlnode import escape as html_escape
+from output import Output
+from urls import mark_url
+
+LISTINGS_VERSION = "2"
+POSTS_PER_PAGE = 10
+FEED_LENGTH = 20
+
+
+# what's known about a generated page once it has been rendered.
+# url is relative to the site root (no base path), updated is a unix timestamp
+class PageInfo(NamedTuple):
+    url: str
+    title: str
+    updated: float
+
+
+# collects every generated page, then writes the things that list them:
+# section index pages (i.e. /blog/), sitemap.xml and an atom feed.
+# base_path and site_url are only needed for the sitemap and feed, which need full urls
+class Site:
+    def __init__(
+        self,
+        base_path: str = "/",
+        site_url: str = "",
+        cache: JsonCache | None = None,
+    ) -> None:
+        self.base_path = base_path
+        self.site_url = site_url.rstrip("/")
+        self.cache = cache if cache is not None else JsonCache(None, LISTINGS_VERSION)
+        self.pages: list[PageInfo] = []
+
+    def add_page(self, page: PageInfo) -> None:
+        self.pages.append(page)
+
+    # title of the home page, the closest thing to a site name
+    def home_title(self) -> str:
+        for p in self.pages:
+            if p.url == "/":
+                return p.title
+        return ""
+
+    def absolute_url(self, url: str, base_path: str | None = None) -> str:
+        base_path = self.base_path if base_path is None else base_path
+        return self.site_url + base_path.rstrip("/") + url
+
+    # pages under /<section>/ (not the section root itself), oldest first
+    def section(self, name: str) -> list[PageInfo]:
+        prefix = f"/{name}/"
+        posts = [p for p in self.pages if p.url.startswith(prefix) and p.url != prefix]
+        return sorted(posts, key=lambda p: (p.updated, p.url))
+
+    # (path relative to the output root, title, body html) for each listing page.
+    # archive pages are numbered from the oldest post, so a new post only changes
+    # the newest archive page and the section root, and everything else comes
+    # straight out of the cache
+    def listing_pages(
+        self, section: str, per_page: int = POSTS_PER_PAGE
+    ) -> Iterator[tuple[str, str, str]]:
+        posts = self.section(section)
+        if not posts:
+            return
+        name = section.capitalize()
+        # a hand written index page wins over the generated one
+        has_index = any(p.url == f"/{section}/" for p in self.pages)
+        chunks = [posts[i : i + per_page] for i in range(0, len(posts), per_page)]
+        archive = [f"/{section}/page/{i}/" for i in range(1, len(chunks) + 1)]
+
+        newest = list(reversed(posts))[:per_page]
+        nav = [(f"Page {i}", url) for i, url in enumerate(archive, 1)]
+        if not has_index:
+            yield (
+                f"{section}/index.html",
+                name,
+                self.__listing_html(name, newest, nav),
+            )
+
+        for i, chunk in enumerate(chunks):
+            nav = [(f"All {section} posts", f"/{section}/")]
+            if i > 0:
+                nav.append(("Older", archive[i - 1]))
+            if i + 1 < len(chunks):
+                nav.append(("Newer", archive[i + 1]))
+            title = f"{name} (page {i + 1})"
+            yield (
+                f"{section}/page/{i + 1}/index.html",
+                title,
+                self.__listing_html(title, list(reversed(chunk)), nav),
+            )
+
+    def __listing_html(
+        self, title: str, posts: list[PageInfo], nav: list[tuple[str, str]]
+    ) -> str:
+        key = content_hash(json.dumps([title, posts, nav]))
+        html = self.cache.get(key)
+        if html is not None:
+            return html
+
+        buf = [f"<div><h1>{html_escape(title)}</h1><ul>"]
+        for p in posts:
+            updated = _iso(p.updated)
+            buf.append(
+                f'<li><a href="{mark_url(html_escape(p.url))}">{html_escape(p.title)}</a> '
+                + f'<time datetime="{updated}">{updated[:10]}</time></li>'
+            )
+        links = [
+            f'<a href="{mark_url(html_escape(u))}">{html_escape(t)}</a>' for t, u in nav
+        ]
+        buf.append(f"</ul><nav>{" ".join(links)}</nav></div>")
+        html = "".join(buf)
+        self.cache.set(key, html)
+        return html
+
+    # base_path overrides the site's, for writing to several output trees
+    def write_sitemap(
+        self,
+        dest_root: str,
+        output: Output | None = None,
+        base_path: str | None = None,
+    ) -> None:
+        buf = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+        ]
+        for p in sorted(self.pages, key=lambda p: p.url):
+            buf.append(
+                f"<url><loc>{_xml(self.absolute_url(p.url, base_path))}</loc>"
+                + f"<lastmod>{_iso(p.updated)}</lastmod></url>\n"
+            )
+        buf.append("</urlset>\n")
+        (output or Output()).write(os.path.join(dest_root, "sitemap.xml"), "".join(buf))
+
+    # atom feed of the newest posts in a section. atom needs an author, it's the
+    # title when there isn't one
+    def write_feed(
+        self,
+        dest_root: str,
+        section: str,
+        title: str,
+        limit: int = FEED_LENGTH,
+        output: Output | None = None,
+        base_path: str | None = None,
+        author: str = "",
+    ) -> None:
+        posts = list(reversed(self.section(section)))[:limit]
+        feed_url = self.absolute_url(f"/{section}/feed.xml", base_path)
+        updated = _iso(posts[0].updated if posts else 0)
+        buf = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+            f"<title>{_xml(title)}</title>\n",
+            f"<id>{_xml(feed_url)}</id>\n",
+            f'<link rel="self" href="{_xml(feed_url)}"/>\n',
+            f'<link href="{_xml(self.absolute_url(f"/{section}/", base_path))}"/>\n',
+            f"<updated>{updated}</updated>\n",
+            f"<author><name>{_xml(author or title)}</name></author>\n",
+        ]
+        for p in posts:
+            url = _xml(self.absolute_url(p.url, base_path))
+            buf.append(
+                f"<entry><title>{_xml(p.title)}</title>"
+                + f'<link href="{url}"/><id>{url}</id>'
+                + f"<updated>{_iso(p.updated)}</updated></entry>\n"
+            )
+        buf.append("</feed>\n")
+        feed_path = os.path.join(dest_root, section, "feed.xml")
+        (output or Output()).write(feed_path, "".join(buf))
+
+
+# same as xml.sax.saxutils.escape with quotes, which would import urllib.request
+# (and with it most of http and email) just for this
+def _xml(text: str) -> str:
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
@@ -1,15 +1,201 @@
-from ssg import copy_dir, generate_pages
+import os
 import sys
 
+CACHE_DIR = "./.ssg-cache"
+# templates/<section>.html is used for pages in content/<section>/,
+# partials they include can go in a subdirectory like templates/partials/
+TEMPLATES_DIR = "./templates"
 
+
+# each mode imports what it needs when it runs, so a one off render of a single file
+# doesn't pay for loading the whole build (or http.server)
 def main():
     _script, *args = sys.argv
+    flags = {a for a in args if a.startswith("--")}
+    args = [a for a in args if not a.startswith("--")]
+    if args[:1] == ["serve"]:
+        serve_preview(args[1:])
+    elif args[:1] == ["render"]:
+        render(args[1:], flags)
+    else:
+        build(args, flags)
+
+
+# serve [port] renders pages as they're asked for instead of building them all,
+# for previews. the template is the same, static files are served as they are
+def serve_preview(args: list[str]):
+    from mdparser import fragment_cache
+    from server import PreviewSite, serve
+
+    site = PreviewSite(
+        "./template.html",
+        "./content",
+        "./static",
+        fragment_cache=fragment_cache(),
+        section_templates=find_section_templates(TEMPLATES_DIR),
+    )
+    serve(site, int(args[0]) if len(args) > 0 else 8888)
+
+
+# render [file] writes the html for a markdown file (or stdin) to stdout, a block
+# at a time as it's read. --template=path puts it in a template, with a title
+# from its front matter or --title=
+def render(args: list[str], flags: set[str]):
+    from contextlib import nullcontext
+
+    from ssg import stream_page
+    from templates import compile_template
+
+    options = dict(f.removeprefix("--").partition("=")[::2] for f in flags)
+    template = options.get("template")
+    src = open(args[0]) if len(args) > 0 else nullcontext(sys.stdin)
+    try:
+        with src as f:
+            stream_page(
+                f,
+                sys.stdout,
+                compile_template(template) if template else None,
+                options.get("title", ""),
+            )
+    except BrokenPipeError:
+        # whatever was reading stopped early (i.e. | head), like it does for any
+        # other tool in a pipeline. nothing more gets written, even on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def build(args: list[str], flags: set[str]):
+    from assets import ASSETS_VERSION, Assets
+    from cache import JsonCache
+    from listings import LISTINGS_VERSION, Site
+    from mdparser import fragment_cache
+    from minify import MINIFY_VERSION, Minifier
+    from output import Output
+    from search import SearchIndex
+    from ssg import PageError, Variant, copy_dir, generate_listings, generate_pages
+    from templates import TemplateCache
+
     base_path = args[0] if len(args) > 0 else "/"
     target_dir = args[1] if len(args) > 1 else "./public"
-    print("Base path: ", base_path)
-    print("Generated: ", target_dir)
-    copy_dir("./static", target_dir)
-    generate_pages("./template.html", "./content", target_dir, base_path=base_path)
+    # i.e. https://example.com, the sitemap and feed need full urls
+    site_url = args[2] if len(args) > 2 else ""
+    options = dict(f.removeprefix("--").partition("=")[::2] for f in flags)
+    # --author=name for the feed, otherwise it's the site's title
+    author = options.get("author", "")
+    # --workers=N renders pages on N threads, they're written in the same order
+    workers = options.get("workers", "1")
+    if not workers.isdecimal() or int(workers) < 1:
+        raise ValueError(f"expected --workers=<number of threads>, got {workers!r}")
+    # --variant=/:./public also writes the site to ./public with a base path of /,
+    # from the same render. it can be given more than once
+    targets = {target_dir: base_path}
+    for f in sorted(f for f in flags if f.startswith("--variant=")):
+        variant_base, sep, variant_dir = f.removeprefix("--variant=").partition(":")
+        if not sep or not variant_dir:
+            raise ValueError(f"expected --variant=<base path>:<dir>, got {f}")
+        targets.setdefault(variant_dir, variant_base)
+    # files that come out the same as last build are left alone, and anything the
+    # build didn't write (i.e. a deleted page) is pruned once it's done
+    # --relative-links links pages with relative urls, so the output works under
+    # any base path
+    relative = "--relative-links" in flags
+    variants = [Variant(b, d, Output(d), relative) for d, b in targets.items()]
+    for v in variants:
+        print("Base path: ", v.base_path)
+        print("Generated: ", v.root)
+    cache = fragment_cache(f"{CACHE_DIR}/fragments.json")
+    search_index = SearchIndex()
+    listings_cache = JsonCache(f"{CACHE_DIR}/listings.json", LISTINGS_VERSION)
+    site = Site(base_path, site_url, listings_cache)
+    section_templates = find_section_templates(TEMPLATES_DIR)
+    assets_cache = JsonCache(f"{CACHE_DIR}/assets.json", ASSETS_VERSION)
+    # --hash-assets copies static files to content hashed names and points pages
+    # and templates at those, so they can be cached forever
+    assets = Assets("./static", assets_cache, "--hash-assets" in flags)
+    # --minify strips comments and indentation out of the templates and css.
+    # page bodies are generated without any to begin with
+    minify_cache = JsonCache(f"{CACHE_DIR}/minify.json", MINIFY_VERSION)
+    minifier = Minifier(minify_cache) if "--minify" in flags else None
+    templates = TemplateCache(minifier.html if minifier else None)
+    # --keep-going builds every page it can, then lists the ones that failed
+    errors: list[PageError] | None = [] if "--keep-going" in flags else None
+    for v in variants:
+        copy_dir("./static", v.root, assets, minifier, v.output)
+    generate_pages(
+        "./template.html",
+        "./content",
+        target_dir,
+        fragment_cache=cache,
+        search_index=search_index,
+        site=site,
+        section_templates=section_templates,
+        assets=assets,
+        templates=templates,
+        variants=variants,
+        errors=errors,
+        workers=int(workers),
+    )
+    generate_listings(
+        "./template.html",
+        target_dir,
+        site,
+        "blog",
+        section_templates=section_templates,
+        assets=assets,
+        templates=templates,
+        variants=variants,
+    )
+    cache.save()
+    listings_cache.save()
+    assets_cache.save()
+    if minifier is not None:
+        minify_cache.save()
+    for v in variants:
+        if assets.hash_names:
+            assets.write_manifest(v.root, v.output)
+        search_index.write(os.path.join(v.root, "search"), v.output, v.base_path)
+        if site_url:
+            site.write_sitemap(v.root, v.output, v.base_path)
+            site.write_feed(
+                v.root,
+                "blog",
+                site.home_title(),
+                output=v.output,
+                base_path=v.base_path,
+                author=author,
+            )
+    if not site_url:
+        print("No site url given, skipping sitemap.xml and feed")
+    if errors:
+        # the output is incomplete, so it's left for the next build to prune and
+        # the report compares against the last complete build
+        print(f"{len(errors)} pages failed:")
+        for error in errors:
+            print(f"  {error}")
+        sys.exit(1)
+    for v in variants:
+        # build-report.json lists what was added/changed/removed since the last
+        # build, so a deploy only has to upload (and invalidate) those
+        report = v.output.save()
+        for path in v.output.prune():
+            print(f"Removed {path}")
+        print(
+            f"{v.root}: wrote {v.output.changed} files, {v.output.unchanged} unchanged"
+        )
+        print(
+            f"Since last build: {len(report.added)} added, {len(report.changed)} changed,"
+            + f" {len(report.removed)} removed, {len(report.unchanged)} unchanged"
+        )
+
+
+def find_section_templates(templates_dir: str) -> dict[str, str]:
+    if not os.path.isdir(templates_dir):
+        return {}
+    return {
+        f.removesuffix(".html"): os.path.join(templates_dir, f)
+        for f in os.listdir(templates_dir)
+        if f.endswith(".html")
+    }
 
 
 if __name__ == "__main__":
@@ -1,17 +1,196 @@
-from blocknode import text_to_blocks
-from htmlnode import HTMLNode, LeafNode, ParentNode
+import os
+from typing import Iterable, Iterator, NamedTuple
 
+from blocknode import BlockNode, Heading, has_content, text_to_blocks
+from cache import JsonCache, content_hash
+from funcs import unique_slug
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape
+from nodepool import NodePool
+from urls import UrlResolver, keep_url, mark_url, resolve_marked
 
-def markdown_to_html(markdown: str) -> str:
-    return markdown_to_html_node(markdown).to_html()
+# bump whenever the html produced for a block changes, so cached fragments get dropped
+PARSER_VERSION = "4"
 
+# html, heading level (0 if not a heading), plain text
+type Fragment = tuple[str, int, str]
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
+
+# a block that failed to render. line is where it starts in the markdown passed in
+class MarkdownError(ValueError):
+    def __init__(self, line: int, cause: Exception) -> None:
+        super().__init__(f"line {line}: {type(cause).__name__}: {cause}")
+        self.line = line
+
+
+class RenderedPage(NamedTuple):
+    html: str
+    title: str | None  # text of the first h1
+    headings: list[Heading]
+    texts: list[str]  # plain text of each block, for things like search
+
+
+def markdown_to_html(markdown: str, resolve: UrlResolver = keep_url) -> str:
+    return markdown_to_html_node(markdown).to_html(resolve)
+
+
+# with a pool, the tree comes back interned: subtrees it shares with anything else
+# built from the same pool are the same (immutable) objects
+def markdown_to_html_node(markdown: str, pool: NodePool | None = None) -> HTMLNode:
     root = ParentNode("div")
     blocks = text_to_blocks(markdown)
     html_nodes = list(map(lambda b: b.to_html_node(), blocks))
     root.children = html_nodes
-    return root
+    return pool.intern(root) if pool is not None else root
+
+
+# same output as markdown_to_html, but written straight into a string buffer
+# instead of building (and then walking) an HTMLNode tree
+def markdown_to_html_fast(markdown: str, resolve: UrlResolver = keep_url) -> str:
+    return render_markdown(markdown, resolve=resolve).html
+
+
+# renders the document without an HTMLNode tree, recording the title and headings
+# on the way. blocks render independently of each other, so with a cache only
+# blocks whose source text changed since the last render get parsed again.
+# fragments keep their site relative urls marked (see urls.py), resolve is run over
+# those when the page is put together. resolve=mark_url leaves them marked
+def render_markdown(
+    markdown: str, cache: JsonCache | None = None, resolve: UrlResolver = keep_url
+) -> RenderedPage:
+    buf = ["<div>"]
+    title = None
+    headings: list[Heading] = []
+    texts: list[str] = []
+    for html, level, plain_text, slug in render_blocks(
+        markdown.split("\n\n"), cache, resolve
+    ):
+        if level > 0:
+            headings.append(Heading(level, plain_text, len(texts), slug))
+            if level == 1 and title is None:
+                title = plain_text
+        buf.append(html)
+        texts.append(plain_text)
+    buf.append("</div>")
+    return RenderedPage("".join(buf), title, headings, texts)
+
+
+# renders markdown that's been split on blank lines (i.e. by read_blocks) a block at
+# a time, skipping the empty ones. yields the html, heading level, plain text and id
+# ("" if it isn't a heading) of each
+def render_blocks(
+    pieces: Iterable[str],
+    cache: JsonCache | None = None,
+    resolve: UrlResolver = keep_url,
+) -> Iterator[tuple[str, int, str, str]]:
+    slugs: dict[str, int] = {}
+    line = 1  # where the current piece starts
+    for piece in pieces:
+        try:
+            html, level, plain_text = _render_cached_block(piece.strip(), cache)
+        except Exception as e:
+            leading = piece[: len(piece) - len(piece.lstrip())]
+            raise MarkdownError(line + leading.count("\n"), e) from e
+        line += piece.count("\n") + 2
+        if not html:
+            continue
+        if resolve is not mark_url:
+            html = resolve_marked(html, resolve)
+        slug = ""
+        if level > 0:
+            # ids depend on the headings before this one, so they're added here
+            # rather than stored in the (position independent) cached fragment
+            slug = unique_slug(plain_text, slugs)
+            open_tag = f"<h{level}>"
+            html = f'<h{level} id="{escape(slug)}">' + html[len(open_tag) :]
+        yield html, level, plain_text, slug
+
+
+# renders many documents at once, yielding (index in docs, html) for each. docs are
+# sent to a pool of worker processes chunksize at a time, so a chunk only costs one
+# round trip, and each worker keeps one fragment cache for everything it renders
+# (blocks repeated across documents, like boilerplate, are only parsed once per
+# worker). results come in the order of docs, or as they're done with
+# ordered=False. workers=1 renders them one after the other in this process
+def render_many(
+    docs: Iterable[str],
+    workers: int | None = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+) -> Iterator[tuple[int, str]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        cache = fragment_cache()
+        for i, md in enumerate(docs):
+            yield i, render_markdown(md, cache).html
+        return
+    import multiprocessing  # only needed here, and slow to import
+
+    with multiprocessing.Pool(workers, _init_worker) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(_render_indexed, enumerate(docs), chunksize)
+
+
+# set up in every worker process of render_many
+_worker_cache: JsonCache | None = None
+
+
+def _init_worker() -> None:
+    global _worker_cache
+    _worker_cache = fragment_cache()
+
+
+def _render_indexed(doc: tuple[int, str]) -> tuple[int, str]:
+    i, md = doc
+    return i, render_markdown(md, _worker_cache).html
+
+
+# nested <ul> of links to each heading, deeper headings go in a list inside
+# the item of the heading before them
+def toc_html(headings: list[Heading]) -> str:
+    buf: list[str] = []
+    levels: list[int] = []  # level of each open list
+    for h in headings:
+        # close lists deeper than this heading, unless this heading would still
+        # be deeper than the list around them
+        while len(levels) > 1 and h.level < levels[-1] and h.level <= levels[-2]:
+            buf.append("</li></ul>")
+            levels.pop()
+        if levels and h.level < levels[-1]:
+            levels[-1] = h.level
+        if not levels or h.level > levels[-1]:
+            buf.append("<ul>")
+            levels.append(h.level)
+        else:
+            buf.append("</li>")
+        buf.append(f'<li><a href="#{escape(h.slug)}">{escape(h.text)}</a>')
+    buf.append("</li></ul>" * len(levels))
+    return "".join(buf)
+
+
+def fragment_cache(path: str | None = None) -> JsonCache:
+    return JsonCache(path, PARSER_VERSION)
+
+
+def _render_cached_block(text: str, cache: JsonCache | None) -> Fragment:
+    if cache is None:
+        return _render_block(text)
+    key = content_hash(text)
+    cached = cache.get(key)
+    if cached is not None:
+        html, level, plain_text = cached  # json gives back a list
+        return html, level, plain_text
+    fragment = _render_block(text)
+    cache.set(key, fragment)
+    return fragment
+
+
+def _render_block(text: str) -> Fragment:
+    block = BlockNode(text)
+    if not has_content(block):
+        return "", 0, ""
+    buf: list[str] = []
+    block.write_html(buf, mark_url)
+    return "".join(buf), block.level, block.plain_text()
 
 
 def extract_title(html: HTMLNode) -> str:
@@ -0,0 +1,144 @@
+from typing import Callable
+
+from cache import JsonCache, content_hash
+
+MINIFY_VERSION = "2"
+
+# contents of these are copied as is, whitespace in them means something
+_RAW_TAGS = ("pre", "code", "textarea", "script", "style")
+# comments worth keeping: template slots and conditional comments
+_KEPT_COMMENTS = ("<!--SSG_", "<!--[")
+# tags that start or end a line on their own (or aren't shown at all), so indentation
+# next to them can go. between any other tags whitespace is a space on the page
+_BLOCK_TAGS = frozenset(
+    (
+        "html head body title meta link base script style noscript template "
+        "div p ul ol li dl dt dd h1 h2 h3 h4 h5 h6 header footer main nav section "
+        "article aside figure figcaption blockquote pre hr br table thead tbody tfoot "
+        "tr td th caption form fieldset legend details summary address"
+    ).split()
+)
+
+
+# collapses whitespace between tags and in text, and drops comments. whitespace that
+# is only there to indent (a run with a newline next to a block tag) is removed
+# entirely. every character is looked at a constant number of times, so this is linear
+def minify_html(html: str) -> str:
+    lower = html.lower()
+    buf: list[str] = []
+    i = 0
+    n = len(html)
+    last_tag = ""  # name of the tag before the text, opening or closing
+    while i < n:
+        if html[i] != "<":
+            end = html.find("<", i)
+            end = n if end == -1 else end
+            block = last_tag in _BLOCK_TAGS or _tag_name(lower, end) in _BLOCK_TAGS
+            text = _collapse_text(html[i:end], i == 0, end == n, block)
+            # only one space is left where a dropped comment had one either side
+            if text != " " or not buf or not buf[-1].endswith(" "):
+                buf.append(text)
+            i = end
+        elif html.startswith("<!--", i):
+            end = html.find("-->", i + 4)
+            end = n if end == -1 else end + 3
+            if html.startswith(_KEPT_COMMENTS, i):
+                buf.append(html[i:end])
+            i = end
+        else:
+            end = html.find(">", i)
+            end = n if end == -1 else end + 1
+            tag = last_tag = _tag_name(lower, i)
+            if tag in _RAW_TAGS and not html.startswith("</", i):
+                close = lower.find(f"</{tag}", end)
+                close_end = html.find(">", close) if close != -1 else -1
+                end = n if close_end == -1 else close_end + 1
+            buf.append(html[i:end])
+            i = end
+    return "".join(buf)
+
+
+# name of the tag at lower[start] (a <, or the end), without any /. comments and
+# doctypes have none
+def _tag_name(lower: str, start: int) -> str:
+    start += 2 if lower.startswith("</", start) else 1
+    end = start
+    while end < len(lower) and lower[end].isalnum():
+        end += 1
+    return lower[start:end]
+
+
+def _collapse_text(text: str, at_start: bool, at_end: bool, block: bool) -> str:
+    words = text.split()
+    if not words:
+        # indentation next to a block tag (or at either end of the document) goes
+        # entirely, anywhere else it's the space between two inline elements
+        if ("\n" in text and block) or at_start or at_end:
+            return ""
+        return " "
+    lead = " " if text[0].isspace() else ""
+    trail = " " if text[-1].isspace() else ""
+    return lead + " ".join(words) + trail
+
+
+# no space is needed on either side of these
+_CSS_PUNCTUATION = "{};,>"
+
+
+# drops comments and any whitespace css doesn't need, leaving strings alone.
+# spaces before : and around + - ( ) are kept since selectors, calc() and media
+# queries can depend on them
+def minify_css(css: str) -> str:
+    buf: list[str] = []
+    i = 0
+    n = len(css)
+    while i < n:
+        c = css[i]
+        if c in "\"'":
+            end = i + 1
+            while end < n and css[end] != c:
+                end += 2 if css[end] == "\\" else 1
+            buf.append(css[i : end + 1])
+            i = end + 1
+        elif css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif c.isspace():
+            while i < n and css[i].isspace():
+                i += 1
+            before = buf[-1][-1] if buf else ""
+            after = css[i] if i < n else ""
+            if (
+                before
+                and after
+                and before not in _CSS_PUNCTUATION + ":"
+                and after not in _CSS_PUNCTUATION
+            ):
+                buf.append(" ")
+        else:
+            if c == "}" and buf and buf[-1] == ";":
+                buf.pop()  # the last declaration doesn't need its ;
+            buf.append(c)
+            i += 1
+    return "".join(buf)
+
+
+# minifies with results cached by a hash of the input, so unchanged files
+# aren't minified again on the next build
+class Minifier:
+    def __init__(self, cache: JsonCache | None = None) -> None:
+        self.cache = cache if cache is not None else JsonCache(None, MINIFY_VERSION)
+
+    def html(self, text: str) -> str:
+        return self.__cached("html", text, minify_html)
+
+    def css(self, text: str) -> str:
+        return self.__cached("css", text, minify_css)
+
+    def __cached(self, kind: str, text: str, minify: Callable[[str], str]) -> str:
+        key = kind + ":" + content_hash(text)
+        result = self.cache.get(key)
+        if result is None:
+            result = minify(text)
+            self.cache.set(key, result)
+        return result
@@ -0,0 +1,128 @@
+from types import MappingProxyType
+from typing import Any, Mapping, Sequence
+
+from htmlnode import EMPTY_PROPS, HTMLNode, LeafNode, ParentNode
+from urls import UrlResolver, keep_url
+
+
+# shared by the interned node classes. they're built bottom up by a NodePool and can't
+# be changed afterwards, so their structural hash is worked out once and their html
+# is only ever serialized once
+class _Frozen(HTMLNode):
+    __frozen = False
+
+    def _freeze(self, structural_hash: int) -> None:
+        object.__setattr__(self, "structural_hash", structural_hash)
+        object.__setattr__(self, "_html", None)
+        object.__setattr__(self, "_Frozen__frozen", True)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if self.__frozen:
+            raise AttributeError(
+                f"interned nodes can't be changed, tried to set {name}"
+            )
+        object.__setattr__(self, name, value)
+
+    def __hash__(self) -> int:
+        return self.structural_hash or 0
+
+    def __eq__(self, rhs: object, /) -> bool:
+        # against a plain node, compare as that node's type would
+        if isinstance(rhs, HTMLNode) and not isinstance(rhs, _Frozen):
+            return type(rhs).__eq__(rhs, self)
+        return super().__eq__(rhs)
+
+    def to_html(self, resolve: UrlResolver = keep_url) -> str:
+        if resolve is not keep_url:
+            return super().to_html(resolve)
+        html = self.__dict__["_html"]
+        if html is None:
+            html = super().to_html()
+            object.__setattr__(self, "_html", html)
+        return html
+
+
+class FrozenLeafNode(_Frozen, LeafNode):
+    pass
+
+
+class FrozenParentNode(_Frozen, ParentNode):
+    pass
+
+
+# hands out one shared, immutable node for every distinct subtree, so the same
+# <li><a href=...> built for every page is one object (with one props mapping and
+# one serialized string) no matter how many trees it's in. a pool is meant to live
+# as long as a build, nodes are only dropped with it
+class NodePool:
+    def __init__(self) -> None:
+        self.__nodes: dict[tuple, HTMLNode] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    def leaf(
+        self, tag: str | None, value: str, props: Mapping[str, str] = EMPTY_PROPS
+    ) -> FrozenLeafNode:
+        key = (FrozenLeafNode, tag, value, _prop_items(props))
+        node = self.__get(key)
+        if node is None:
+            node = FrozenLeafNode(tag, value, _frozen_props(props))
+            node._freeze(hash(key[1:]))
+            self.__nodes[key] = node
+        return node
+
+    # children should already come from this pool
+    def parent(
+        self,
+        tag: str,
+        children: Sequence[HTMLNode],
+        props: Mapping[str, str] = EMPTY_PROPS,
+    ) -> FrozenParentNode:
+        children = tuple(map(self.intern, children))
+        # interned children are kept alive by the pool, so their ids are stable
+        key = (FrozenParentNode, tag, _prop_items(props), tuple(map(id, children)))
+        node = self.__get(key)
+        if node is None:
+            node = FrozenParentNode(tag, children, _frozen_props(props))
+            child_hashes = tuple(c.structural_hash for c in children)
+            node._freeze(hash((tag, key[2], child_hashes)))
+            self.__nodes[key] = node
+        return node
+
+    # the interned version of a whole tree
+    def intern(self, node: HTMLNode) -> HTMLNode:
+        if isinstance(node, _Frozen) and self.__nodes.get(_key_of(node)) is node:
+            return node
+        if isinstance(node, LeafNode):
+            return self.leaf(node.tag, node.value, node.props)
+        if isinstance(node, ParentNode):
+            return self.parent(node.tag, node.children, node.props)
+        raise ValueError(f"can't intern {node!r}")
+
+    def __get(self, key: tuple) -> Any:
+        node = self.__nodes.get(key)
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return node
+
+
+def _key_of(node: HTMLNode) -> tuple:
+    props = _prop_items(node.props)
+    if isinstance(node, FrozenLeafNode):
+        return (FrozenLeafNode, node.tag, node.value, props)
+    return (FrozenParentNode, node.tag, props, tuple(map(id, node.children)))
+
+
+# sorted, so the same props set in another order give the same key and hash.
+# HTMLNode.__eq__ doesn't care about their order either
+def _prop_items(props: Mapping[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted(props.items()))
+
+
+def _frozen_props(props: Mapping[str, str]) -> Mapping[str, str]:
+    return MappingProxyType(dict(props)) if props else EMPTY_PROPS
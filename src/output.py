@@ -0,0 +1,159 @@
+import json
+import os
+from typing import NamedTuple
+
+from cache import content_hash, file_hash
+
+BUILD_MANIFEST_VERSION = 1
+# what's in the output directory: path -> [size, hash] for every file the build wrote
+BUILD_MANIFEST_NAME = "build-manifest.json"
+# how this build's output differs from the last one's, for deploy tooling
+BUILD_REPORT_NAME = "build-report.json"
+
+
+# writes data to path unless the file already holds exactly that. returns whether
+# it was written. the new content goes to a temp file that's moved over the old one,
+# so a crash part way through never leaves a truncated file behind
+def write_file(path: str, data: str | bytes, h: str | None = None) -> bool:
+    if isinstance(data, str):
+        data = data.encode()
+    h = h or content_hash(data)
+    if _same_size(path, len(data)) and file_hash(path) == h:
+        return False
+    os.makedirs(os.path.dirname(path) or ".", 0o755, True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+# same as write_file, but for copying a file that's already on disk
+def copy_file(src: str, dest: str, h: str | None = None) -> bool:
+    import shutil  # slow to import, and only a build copying files needs it
+
+    h = h or file_hash(src)
+    if _same_size(dest, os.path.getsize(src)) and file_hash(dest) == h:
+        return False
+    os.makedirs(os.path.dirname(dest) or ".", 0o755, True)
+    tmp_path = dest + ".tmp"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+    return True
+
+
+# sizes are checked first so most changed files are found without reading them
+def _same_size(path: str, size: int) -> bool:
+    try:
+        return os.path.getsize(path) == size
+    except OSError:
+        return False
+
+
+# paths are relative to the output root, changed maps each path to how many bytes
+# bigger (or smaller) it got
+class BuildReport(NamedTuple):
+    added: list[str]
+    changed: dict[str, int]
+    removed: list[str]
+    unchanged: list[str]
+
+
+# everything a build writes goes through one of these, so unchanged files keep
+# their mtimes (rsync and CDN diffs only see what really changed) and anything
+# left over from an earlier build can be pruned at the end. with a root, the
+# previous build's manifest is loaded so save() can report what changed since
+class Output:
+    def __init__(self, root: str | None = None) -> None:
+        self.root = root
+        self.written: set[str] = set()
+        self.changed = 0
+        self.unchanged = 0
+        # relative path -> (size, hash), for this build and the one before it
+        self.files: dict[str, tuple[int, str]] = {}
+        self.previous: dict[str, tuple[int, str]] = self.__load_manifest()
+
+    def write(self, path: str, data: str | bytes) -> bool:
+        if isinstance(data, str):
+            data = data.encode()
+        h = content_hash(data)
+        return self.__record(path, len(data), h, write_file(path, data, h))
+
+    # h is src's hash if it's already known, i.e. from Assets.hash_of, which
+    # caches it so unchanged files aren't read every build just to be hashed
+    def copy(self, src: str, dest: str, h: str | None = None) -> bool:
+        h = h or file_hash(src)
+        return self.__record(dest, os.path.getsize(src), h, copy_file(src, dest, h))
+
+    # this build against the last one, going by the manifests rather than the files
+    def report(self) -> BuildReport:
+        added: list[str] = []
+        changed: dict[str, int] = {}
+        unchanged: list[str] = []
+        for path, (size, h) in sorted(self.files.items()):
+            old = self.previous.get(path)
+            if old is None:
+                added.append(path)
+            elif old[1] != h:
+                changed[path] = size - old[0]
+            else:
+                unchanged.append(path)
+        removed = sorted(p for p in self.previous if p not in self.files)
+        return BuildReport(added, changed, removed, unchanged)
+
+    # writes the manifest and report into root, returning the report
+    def save(self) -> BuildReport:
+        report = self.report()
+        if self.root is None:
+            return report
+        manifest = {
+            "version": BUILD_MANIFEST_VERSION,
+            "files": {p: list(v) for p, v in sorted(self.files.items())},
+        }
+        for name, data in [
+            (BUILD_REPORT_NAME, report._asdict()),
+            (BUILD_MANIFEST_NAME, manifest),
+        ]:
+            path = os.path.join(self.root, name)
+            write_file(path, json.dumps(data, indent=2))
+            self.written.add(os.path.abspath(path))
+        return report
+
+    # deletes every file under root that wasn't written this build, and any
+    # directories that leaves empty. returns the deleted files
+    def prune(self) -> list[str]:
+        if self.root is None or not os.path.isdir(self.root):
+            return []
+        pruned: list[str] = []
+        for dirpath, _dirnames, filenames in os.walk(self.root, topdown=False):
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                if os.path.abspath(path) not in self.written:
+                    os.remove(path)
+                    pruned.append(path)
+            if dirpath != self.root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        return sorted(pruned)
+
+    def __record(self, path: str, size: int, h: str, changed: bool) -> bool:
+        self.written.add(os.path.abspath(path))
+        if self.root is not None:
+            rel_path = os.path.relpath(path, self.root).replace(os.path.sep, "/")
+            self.files[rel_path] = (size, h)
+        if changed:
+            self.changed += 1
+        else:
+            self.unchanged += 1
+        return changed
+
+    def __load_manifest(self) -> dict[str, tuple[int, str]]:
+        if self.root is None:
+            return {}
+        try:
+            with open(os.path.join(self.root, BUILD_MANIFEST_NAME)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}  # first build, everything counts as added
+        if not isinstance(data, dict) or data.get("version") != BUILD_MANIFEST_VERSION:
+            return {}
+        return {p: (v[0], v[1]) for p, v in data.get("files", {}).items()}
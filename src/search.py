@@ -0,0 +1,79 @@
+import json
+import os
+from collections import Counter
+from typing import Iterable, Iterator
+
+from output import Output
+
+SEARCH_INDEX_VERSION = 1
+# longer words get cut down to this, so one giant "word" can't bloat the index
+MAX_TERM_LENGTH = 32
+# terms are split into shards by their first few characters, so a browser only has
+# to fetch the shard for what's being typed
+SHARD_PREFIX_LENGTH = 2
+
+
+# lowercased words (letters and digits) in the texts, one at a time
+def tokenize(texts: Iterable[str]) -> Iterator[str]:
+    for text in texts:
+        start = -1
+        for i, c in enumerate(text):
+            if c.isalnum():
+                if start == -1:
+                    start = i
+                continue
+            if start != -1:
+                yield from _term(text, start, i)
+                start = -1
+        if start != -1:
+            yield from _term(text, start, len(text))
+
+
+def _term(text: str, start: int, end: int) -> Iterator[str]:
+    # single characters aren't worth searching for
+    if end - start > 1:
+        yield text[start : min(end, start + MAX_TERM_LENGTH)].lower()
+
+
+# inverted index of term -> [(page id, times it appears on the page), ...]
+# pages are added as they are rendered, then written out once at the end of the build
+class SearchIndex:
+    def __init__(self) -> None:
+        self.pages: list[tuple[str, str]] = []  # (url, title) by page id
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+
+    def add_page(self, url: str, title: str, texts: Iterable[str]) -> None:
+        page_id = len(self.pages)
+        self.pages.append((url, title))
+        for term, count in Counter(tokenize(texts)).items():
+            self.postings.setdefault(term, []).append((page_id, count))
+
+    # writes index.json (pages and the list of shards) and one <prefix>.json per shard.
+    # base_path goes in front of the page urls, so one index can be written to several
+    # output trees with different base paths
+    def write(
+        self, dest_dir: str, output: Output | None = None, base_path: str = "/"
+    ) -> None:
+        output = output or Output()
+        base = base_path.rstrip("/")
+        shards: dict[str, dict[str, list[tuple[int, int]]]] = {}
+        for term in sorted(self.postings):
+            shard = shards.setdefault(term[:SHARD_PREFIX_LENGTH], {})
+            shard[term] = self.postings[term]
+
+        for prefix, terms in shards.items():
+            _write_json(output, os.path.join(dest_dir, f"{prefix}.json"), terms)
+        _write_json(
+            output,
+            os.path.join(dest_dir, "index.json"),
+            {
+                "version": SEARCH_INDEX_VERSION,
+                "prefix_length": SHARD_PREFIX_LENGTH,
+                "pages": [(base + url, title) for url, title in self.pages],
+                "shards": list(shards.keys()),
+            },
+        )
+
+
+def _write_json(output: Output, path: str, data: object):
+    output.write(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
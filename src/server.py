@@ -0,0 +1,201 @@
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+from urllib.parse import unquote, urlsplit
+
+from cache import content_hash
+from ssg import page_error, render_page
+from templates import Template
+from urls import base_path_resolver, resolve_marked
+
+
+# a page as it's served, along with what it was rendered from so it can be
+# thrown out once any of that changes
+class _Entry(NamedTuple):
+    mtime: float  # of the markdown
+    template: Template
+    body: bytes
+    etag: str
+
+
+_NO_HEADERS: Mapping[str, str] = MappingProxyType({})
+
+
+# a response, before it's written
+class Response(NamedTuple):
+    status: HTTPStatus
+    body: bytes = b""
+    headers: Mapping[str, str] = _NO_HEADERS
+
+
+# serves a site straight from its sources, rendering each page the first time it's
+# asked for instead of building the whole site up front (i.e. for previews). the
+# last max_pages pages rendered are kept, until their markdown or template changes.
+# kwargs are the same as generate_pages takes, though listings, the search index
+# and the sitemap and feed are only made by a full build
+class PreviewSite:
+    def __init__(
+        self,
+        template_path: str,
+        content_dir: str,
+        static_dir: str,
+        base_path: str = "/",
+        max_pages: int = 256,
+        **kwargs,
+    ) -> None:
+        self.template_path = template_path
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.base_path = base_path
+        self.max_pages = max_pages
+        self.kwargs = kwargs
+        self.kwargs.setdefault("content_root", content_dir)
+        self.hits = 0
+        self.misses = 0
+        self.__pages: OrderedDict[str, _Entry] = OrderedDict()
+        # requests are handled on a thread each, pages are rendered one at a time
+        self.__lock = threading.Lock()
+
+    def get(self, url: str, if_none_match: str | None = None) -> Response:
+        path = unquote(urlsplit(url).path)
+        if not path.startswith(self.base_path):
+            return Response(HTTPStatus.NOT_FOUND)
+        rel_path = path.removeprefix(self.base_path)
+
+        md_path = self.source(rel_path)
+        if md_path is not None:
+            try:
+                entry = self.page(md_path)
+            except Exception as e:
+                message = str(page_error(md_path, e)).encode()
+                headers = {"Content-Type": "text/plain; charset=utf-8"}
+                return Response(HTTPStatus.INTERNAL_SERVER_ERROR, message, headers)
+            if entry is None:  # a draft
+                return Response(HTTPStatus.NOT_FOUND)
+            return _respond(entry.body, entry.etag, "text/html", if_none_match)
+
+        # /blog/tom -> /blog/tom/
+        if not rel_path.endswith("/") and self.source(rel_path + "/") is not None:
+            location = self.base_path + rel_path + "/"
+            return Response(
+                HTTPStatus.MOVED_PERMANENTLY, headers={"Location": location}
+            )
+
+        static_path = _inside(self.static_dir, rel_path)
+        if not os.path.isfile(static_path):
+            return Response(HTTPStatus.NOT_FOUND)
+        st = os.stat(static_path)
+        # good enough to tell versions of a file apart without reading it
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if _matches(etag, if_none_match):
+            return Response(HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+        with open(static_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(static_path)[0]
+        return _respond(body, etag, content_type or "application/octet-stream")
+
+    # the markdown a page is rendered from, the reverse of what generate_pages does:
+    # blog/tom/ is blog/tom/index.md and contact.html is contact.md
+    def source(self, rel_path: str) -> str | None:
+        if rel_path == "" or rel_path.endswith("/"):
+            md_rel_path = rel_path + "index.md"
+        elif rel_path.endswith(".html"):
+            md_rel_path = rel_path.removesuffix(".html") + ".md"
+        else:
+            return None
+        md_path = _inside(self.content_dir, md_rel_path)
+        if not os.path.isfile(md_path):
+            return None
+        return md_path
+
+    # None for drafts
+    def page(self, md_path: str) -> _Entry | None:
+        with self.__lock:
+            mtime = os.path.getmtime(md_path)
+            entry = self.__pages.get(md_path)
+            if (
+                entry is not None
+                and entry.mtime == mtime
+                and not entry.template.is_stale()
+            ):
+                self.hits += 1
+                self.__pages.move_to_end(md_path)
+                return entry
+
+            self.misses += 1
+            self.__pages.pop(md_path, None)
+            page = render_page(self.template_path, md_path, **self.kwargs)
+            if page is None:
+                return None
+            html = resolve_marked(page.html, base_path_resolver(self.base_path))
+            body = html.encode()
+            entry = _Entry(mtime, page.template, body, f'"{content_hash(body)}"')
+            self.__pages[md_path] = entry
+            while len(self.__pages) > self.max_pages:
+                self.__pages.popitem(last=False)
+            return entry
+
+
+# a url path joined onto root, any ../ in it stops at root like it would for a url
+def _inside(root: str, path: str) -> str:
+    path = posixpath.normpath("/" + path).lstrip("/")
+    return os.path.join(root, *path.split("/"))
+
+
+# If-None-Match is a list of etags, or * for any
+def _matches(etag: str, if_none_match: str | None) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _respond(
+    body: bytes, etag: str, content_type: str, if_none_match: str | None = None
+) -> Response:
+    # previews change under the browser, so it always checks back (and mostly gets
+    # a 304 for its trouble)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(etag, if_none_match):
+        return Response(HTTPStatus.NOT_MODIFIED, headers=headers)
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    headers["Content-Type"] = content_type
+    return Response(HTTPStatus.OK, body, headers)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    site: PreviewSite  # set on a subclass by serve
+
+    def do_GET(self) -> None:
+        self.__send(self.site.get(self.path, self.headers.get("If-None-Match")))
+
+    def do_HEAD(self) -> None:
+        self.__send(self.site.get(self.path, self.headers.get("If-None-Match")), False)
+
+    def __send(self, response: Response, with_body: bool = True) -> None:
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        if response.status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if with_body and response.status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(response.body)
+
+
+def make_server(site: PreviewSite, port: int = 8888) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"site": site})
+    return ThreadingHTTPServer(("", port), handler)
+
+
+def serve(site: PreviewSite, port: int = 8888) -> None:
+    with make_server(site, port) as server:
+        print(f"Serving {site.content_dir} at http://localhost:{port}{site.base_path}")
+        server.serve_forever()
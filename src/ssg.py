@@ -1,86 +1,333 @@
 import os
-import shutil
+from collections import deque
+from itertools import chain
+from typing import IO, Callable, Iterator, NamedTuple
 
-from mdparser import extract_title, markdown_to_html_node
+from assets import Assets
+from blocknode import read_blocks
+from frontmatter import (
+    FrontMatter,
+    FrontMatterError,
+    front_matter_date,
+    read_front_matter,
+    read_front_matter_stream,
+)
+from listings import PageInfo, Site
+from mdparser import MarkdownError, render_blocks, render_markdown, toc_html
+from minify import Minifier
+from output import Output
+from templates import TARGET, TITLE, TOC, Template, TemplateCache
+from urls import (
+    base_path_resolver,
+    join_marked,
+    keep_url,
+    mark_url,
+    mark_urls,
+    relative_resolver,
+    resolve_marked,
+    split_marked,
+)
 
-SSG_TITLE = "<!--SSG_TITLE-->"
-SSG_TARGET = "<!--SSG_TARGET-->"
+# shared by every build in this process unless one is passed in with templates=
+_templates = TemplateCache()
 
 
 def generate_pages(template_path: str, src_dir: str, dest_root: str, **kwargs):
-    ls = os.listdir(src_dir)
+    # so pages know where the site root is
+    kwargs.setdefault("output_root", dest_root)
+    kwargs.setdefault("content_root", src_dir)
+    pages = find_pages(src_dir, dest_root)
+    workers = kwargs.get("workers", 1)
+    if workers <= 1:
+        for md_path, dest_path in pages:
+            generate_page(template_path, md_path, dest_path, **kwargs)
+        return
 
-    for f in ls:
+    # workers=N renders pages on N threads, all sharing the same templates, fragment
+    # cache and assets. they're still written here one at a time and in the same
+    # order as they would be without, so the search index, listings and output all
+    # come out the same. a few pages per worker are rendered ahead of the one being
+    # written, any more would only be held in memory
+    from concurrent.futures import ThreadPoolExecutor  # slow to import
+
+    with ThreadPoolExecutor(workers) as pool:
+        ahead: deque[tuple[str, str, Callable[[], BuiltPage | None]]] = deque()
+        for md_path, dest_path in pages:
+            page = pool.submit(render_page, template_path, md_path, **kwargs)
+            ahead.append((md_path, dest_path, page.result))
+            if len(ahead) > workers * 4:
+                generate_page(template_path, *ahead.popleft(), **kwargs)
+        while ahead:
+            generate_page(template_path, *ahead.popleft(), **kwargs)
+
+
+# (markdown, html) paths for every page under src_dir, in the order they're built
+def find_pages(src_dir: str, dest_root: str) -> Iterator[tuple[str, str]]:
+    for f in os.listdir(src_dir):
         if os.path.isfile(os.path.join(src_dir, f)):
-            generate_page(
-                template_path,
+            yield (
                 os.path.join(src_dir, f),
                 os.path.join(dest_root, f"{f.rstrip(".md")}.html"),
-                **kwargs,
             )
         else:
-            generate_pages(
-                template_path,
-                os.path.join(src_dir, f),
-                os.path.join(dest_root, f),
-                **kwargs,
-            )
+            yield from find_pages(os.path.join(src_dir, f), os.path.join(dest_root, f))
+
+
+# a page that failed to build, with where in its source things went wrong if known
+class PageError(NamedTuple):
+    path: str
+    line: int | None
+    message: str
+
+    def __str__(self) -> str:
+        location = self.path if self.line is None else f"{self.path}:{self.line}"
+        return f"{location}: {self.message}"
+
+
+# with errors=[] the build keeps going past pages that fail, adding a PageError
+# for each to the list, instead of stopping at the first one. rendered gets the page
+# when it's rendered elsewhere, i.e. on one of generate_pages' workers
+def generate_page(
+    template_path: str,
+    md_path: str,
+    dest_path: str,
+    rendered: "Callable[[], BuiltPage | None] | None" = None,
+    **kwargs,
+):
+    errors: list[PageError] | None = kwargs.get("errors")
+    try:
+        _generate_page(template_path, md_path, dest_path, rendered, **kwargs)
+    except Exception as e:
+        if errors is None:
+            raise
+        error = page_error(md_path, e)
+        print(f"Failed to generate {dest_path}: {error}")
+        errors.append(error)
+
 
+def page_error(md_path: str, e: Exception) -> PageError:
+    message = f"{type(e).__name__}: {e}"
+    if isinstance(e, FrontMatterError):
+        return PageError(md_path, e.line, message)
+    if isinstance(e, MarkdownError):
+        # the markdown's lines are counted from the end of the front matter
+        with open(md_path) as f:
+            read_front_matter(f)
+            body = f.read()
+            f.seek(0)
+            offset = f.read().count("\n") - body.count("\n")
+        return PageError(md_path, e.line + offset, message)
+    return PageError(md_path, None, message)
 
-def generate_page(template_path: str, md_path: str, dest_path: str, **kwargs):
-    template = ""
+
+def _generate_page(
+    template_path: str,
+    md_path: str,
+    dest_path: str,
+    rendered: "Callable[[], BuiltPage | None] | None",
+    **kwargs,
+):
+    search_index = kwargs.get("search_index")
+    site = kwargs.get("site")
+    output_root = kwargs.get("output_root", ".")
+
+    print(f"Generating page {dest_path} from {md_path}")
+    if rendered is not None:
+        page = rendered()
+    else:
+        page = render_page(template_path, md_path, **kwargs)
+    if page is None:
+        return
+    _write_variants(os.path.relpath(dest_path, output_root), page.html, **kwargs)
+
+    # urls are kept without the base path, it's added when each variant is written
+    url = page_url(dest_path, output_root)
+    if search_index is not None:
+        search_index.add_page(url, page.title, page.texts)
+    if site is not None:
+        updated = front_matter_date(page.meta) or os.path.getmtime(md_path)
+        site.add_page(PageInfo(url, page.title, updated))
+
+
+# a page put through its template, with its site relative urls still marked
+class BuiltPage(NamedTuple):
+    html: str
+    title: str
+    meta: FrontMatter
+    texts: list[str]
+    template: Template
+
+
+# None for drafts, unless drafts=True
+def render_page(template_path: str, md_path: str, **kwargs) -> BuiltPage | None:
     md = ""
-    base_path = kwargs.get("base_path", "/")
+    cache = kwargs.get("fragment_cache")
+    assets = kwargs.get("assets")
 
-    with open(template_path) as tmpl, open(md_path) as mdf:
-        template = tmpl.read()
+    with open(md_path) as mdf:
+        # drafts are skipped before their body is even read
+        meta = read_front_matter(mdf)
+        if meta.get("draft") is True and not kwargs.get("drafts", False):
+            print(f"Skipping draft {md_path}")
+            return None
         md = mdf.read()
 
-    os.makedirs(os.path.dirname(dest_path), 0o755, True)
-
-    with open(dest_path, "w") as html_file:
-        print(f"Generating page {dest_path} from {md_path} using {template_path}")
-        html_tree = markdown_to_html_node(md)
-        title = extract_title(html_tree)
-        template = (
-            template.replace(SSG_TITLE, title)
-            .replace(SSG_TARGET, html_tree.to_html())
-            .replace('href="/', 'href="' + base_path)
-            .replace('src="/', 'src="' + base_path)
+    template_path = choose_template(template_path, md_path, meta, **kwargs)
+    template = kwargs.get("templates", _templates).get(template_path)
+
+    page = render_markdown(md, cache, mark_url)
+    title = meta.get("title", page.title)
+    if title is None:
+        raise Exception(f"no title or h1 in {md_path}")
+    title = str(title)
+    body = assets.rewrite_images(page.html) if assets else page.html
+    values = {TITLE: title, TARGET: body}
+    if template.has_slot(TOC):
+        values[TOC] = toc_html(page.headings)
+    return BuiltPage(template.render(values), title, meta, page.texts, template)
+
+
+# writes the html for the markdown read from src to out a block at a time, as it's
+# read, so input of any length only takes as much memory as its longest block. with a
+# template the body goes in its TARGET slot, and TITLE is the front matter's title,
+# title= or an h1 the markdown starts with, the same for files and stdin. slots like
+# TOC are left empty, they'd need the whole page
+def stream_page(
+    src: IO[str], out: IO[str], template: Template | None = None, title: str = ""
+):
+    meta, start = read_front_matter_stream(src)
+    title = str(meta.get("title", title))
+    blocks = render_blocks(read_blocks(src, start=start))
+    first = next(blocks, None)
+    if first is not None and first[1] == 1 and not title:
+        title = first[2]
+    body = chain(
+        ["<div>"],
+        [first[0]] if first is not None else [],
+        (html for html, *_ in blocks),
+        ["</div>"],
+    )
+    pieces = template.render_iter({TITLE: title, TARGET: body}) if template else body
+    for piece in pieces:
+        out.write(resolve_marked(piece))
+
+
+# writes the index pages for a section (i.e. /blog/) using the page template
+def generate_listings(
+    template_path: str, dest_root: str, site: Site, section: str, **kwargs
+):
+    kwargs.setdefault("output_root", dest_root)
+    template_path = kwargs.get("section_templates", {}).get(section, template_path)
+    template = kwargs.get("templates", _templates).get(template_path)
+
+    for path, title, html in site.listing_pages(section):
+        print(f"Generating listing {os.path.join(dest_root, path)}")
+        page = template.render({TITLE: title, TARGET: html})
+        _write_variants(path, page, **kwargs)
+
+
+# one output tree. a build can write the same pages to several at once, each with
+# its own base path (i.e. / for previews and /bdev-ssg/ for github pages), by
+# passing variants=[...]. otherwise base_path=, output_root=, output= and
+# relative_links= make one. relative variants link pages to each other with
+# relative urls (../index.css) instead of putting the base path in front
+class Variant(NamedTuple):
+    base_path: str
+    root: str
+    output: Output
+    relative: bool = False
+
+
+def variants(**kwargs) -> list[Variant]:
+    if kwargs.get("variants"):
+        return kwargs["variants"]
+    return [
+        Variant(
+            kwargs.get("base_path", "/"),
+            kwargs.get("output_root", "."),
+            kwargs.get("output") or Output(),
+            kwargs.get("relative_links", False),
         )
+    ]
+
+
+# pages come out of the templates with their site relative urls marked, so they
+# are split apart once here, and each variant only joins them back together
+# with its own urls in place
+def _write_variants(rel_path: str, html: str, **kwargs):
+    assets: Assets | None = kwargs.get("assets")
+    parts = split_marked(html, assets.asset_url if assets else keep_url)
+    url = page_url(rel_path, ".")
+    for v in variants(**kwargs):
+        if v.relative:
+            resolve = relative_resolver(url)
+        else:
+            resolve = base_path_resolver(v.base_path)
+        v.output.write(os.path.join(v.root, rel_path), join_marked(parts, resolve))
+
 
-        html_file.write(template)
+# picks the template for a page: a template named in its front matter (relative to
+# the default template), then one set for its section (the first directory under
+# the content root) with section_templates={"blog": "..."}, then the default
+def choose_template(template_path: str, md_path: str, meta: FrontMatter, **kwargs):
+    if isinstance(meta.get("template"), str):
+        return os.path.join(os.path.dirname(template_path), str(meta["template"]))
+    content_root = kwargs.get("content_root")
+    section_templates: dict[str, str] = kwargs.get("section_templates", {})
+    if content_root is None or not section_templates:
+        return template_path
+    rel_path = os.path.relpath(md_path, content_root)
+    section = rel_path.split(os.path.sep)[0] if os.path.sep in rel_path else ""
+    return section_templates.get(section, template_path)
 
 
-def copy_dir(src: str, dest: str):
+# puts base_path in front of every site relative href="/..." and src="/..." in html
+# that wasn't rendered with its urls marked, and points them at fingerprinted assets
+def resolve_urls(html: str, base_path: str = "/", assets: Assets | None = None) -> str:
+    parts = split_marked(mark_urls(html), assets.asset_url if assets else keep_url)
+    return join_marked(parts, base_path_resolver(base_path))
+
+
+# the url a generated page is served at, i.e. public/blog/tom/index.html -> /blog/tom/
+def page_url(dest_path: str, output_root: str, base_path: str = "/") -> str:
+    path = os.path.relpath(dest_path, output_root).replace(os.path.sep, "/")
+    if path == "index.html":
+        path = ""
+    elif path.endswith("/index.html"):
+        path = path.removesuffix("index.html")
+    return base_path.rstrip("/") + "/" + path
+
+
+# with a minifier, css files are written minified instead of copied. nothing already
+# in dest is deleted, that's left to Output.prune once the whole build is written
+def copy_dir(
+    src: str,
+    dest: str,
+    assets: Assets | None = None,
+    minifier: Minifier | None = None,
+    output: Output | None = None,
+):
     if not os.path.exists(src) or os.path.isfile(src):
         raise ValueError(f"src must be a directory: {src}")
     if os.path.isfile(dest):
         raise ValueError(f"dest must be a directory: {dest}")
 
-    if not os.path.exists(dest):
-        os.makedirs(dest, 0o755, True)
-
-    _clear_dir(dest)
-    contents = os.scandir(src)
-    for file in contents:
+    output = output or Output()
+    os.makedirs(dest, 0o755, True)
+    for file in os.scandir(src):
+        dest_path = os.path.join(dest, file.name)
         if file.is_file():
-            shutil.copy(file.path, dest + os.path.sep + file.name)
+            if minifier is not None and file.name.endswith(".css"):
+                with open(file.path) as f:
+                    css = minifier.css(f.read())
+                output.write(dest_path, css)
+                if assets is not None:
+                    url = assets.url_of(file.path)
+                    assets.write_fingerprinted(url, css, dest, output)
+            else:
+                h = assets.hash_of(file.path) if assets is not None else None
+                output.copy(file.path, dest_path, h)
+                if assets is not None:
+                    assets.copy_fingerprinted(file.path, dest, output)
         else:
-            copy_dir(file.path, dest + os.path.sep + file.name)
-
-
-def _clear_dir(path: str):
-    for f in os.listdir(path):
-        _delete(f"{path}{os.path.sep}{f}")
-
-
-def _delete(path: str):
-    if os.path.isfile(path):
-        os.remove(path)
-    else:
-        try:
-            os.rmdir(path)
-        except OSError:
-            _clear_dir(path)
-            _delete(path)
+            copy_dir(file.path, dest_path, assets, minifier, output)
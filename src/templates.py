@@ -0,0 +1,131 @@
+import os
+import threading
+from typing import Callable, Iterable, Iterator, Mapping
+
+from urls import mark_urls
+
+# slots are html comments like <!--SSG_TITLE-->, <!--SSG_INCLUDE header.html--> pulls
+# in another template (relative to the one including it) when compiling. site relative
+# urls in templates are marked when compiled (see urls.py), same as rendered markdown
+SLOT_START = "<!--SSG_"
+SLOT_END = "-->"
+INCLUDE = "INCLUDE "
+
+TITLE = "TITLE"
+TARGET = "TARGET"
+TOC = "TOC"
+# anything else (i.e. a typo like <!--SSG_TITEL-->) is left in the output as it is,
+# where it can be seen, rather than quietly rendering as nothing
+SLOTS = (TITLE, TARGET, TOC)
+
+
+# a template split up front into the literal text between its slots, so rendering
+# is one join instead of a replace over the whole document per slot
+class Template:
+    def __init__(self, parts: list[str], slots: list[str], files: dict[str, float]):
+        # parts[i] comes right before slots[i], and there's one more part than slots
+        self.parts = parts
+        self.slots = slots
+        # every file the template was compiled from, with its mtime at the time
+        self.files = files
+
+    def render(self, values: Mapping[str, str]) -> str:
+        buf = [self.parts[0]]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            buf.append(values.get(slot, ""))  # unfilled slots are left empty
+            buf.append(part)
+        return "".join(buf)
+
+    # render a piece at a time, where a slot can also be filled with an iterable of
+    # strings that's only consumed as the template gets to it (i.e. a streamed body)
+    def render_iter(self, values: Mapping[str, str | Iterable[str]]) -> Iterator[str]:
+        yield self.parts[0]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            value = values.get(slot, "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield part
+
+    def has_slot(self, name: str) -> bool:
+        return name in self.slots
+
+    def is_stale(self) -> bool:
+        for path, mtime in self.files.items():
+            try:
+                if os.path.getmtime(path) != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+
+# transform is run over the text of every file before it's split up (i.e. minify_html)
+def compile_template(
+    path: str, transform: Callable[[str], str] | None = None
+) -> Template:
+    parts: list[str] = [""]
+    slots: list[str] = []
+    files: dict[str, float] = {}
+    _compile_into(path, parts, slots, files, [], transform)
+    return Template(parts, slots, files)
+
+
+def _compile_into(
+    path: str,
+    parts: list[str],
+    slots: list[str],
+    files: dict[str, float],
+    including: list[str],
+    transform: Callable[[str], str] | None,
+):
+    path = os.path.normpath(path)
+    if path in including:
+        raise ValueError(f"template include cycle: {' -> '.join(including + [path])}")
+    files[path] = os.path.getmtime(path)
+    with open(path) as f:
+        text = f.read()
+    if transform is not None:
+        text = transform(text)
+    text = mark_urls(text)
+
+    i = 0
+    while True:
+        start = text.find(SLOT_START, i)
+        end = text.find(SLOT_END, start + len(SLOT_START)) if start != -1 else -1
+        if end == -1:
+            parts[-1] += text[i:]
+            return
+        parts[-1] += text[i:start]
+        name = text[start + len(SLOT_START) : end]
+        if name.startswith(INCLUDE):
+            include_path = os.path.join(os.path.dirname(path), name[len(INCLUDE) :])
+            _compile_into(
+                include_path, parts, slots, files, including + [path], transform
+            )
+        elif name in SLOTS:
+            slots.append(name)
+            parts.append("")
+        else:
+            parts[-1] += text[start : end + len(SLOT_END)]
+        i = end + len(SLOT_END)
+
+
+# compiled templates by path, recompiled when the template or anything it
+# includes is modified. a single instance is meant to be shared by a whole build
+class TemplateCache:
+    def __init__(self, transform: Callable[[str], str] | None = None) -> None:
+        self.transform = transform
+        self.__templates: dict[str, Template] = {}
+        # pages rendered on threads (see generate_pages) all ask for the same few
+        # templates at once, this way each is still only compiled the once
+        self.__lock = threading.Lock()
+
+    def get(self, path: str) -> Template:
+        with self.__lock:
+            template = self.__templates.get(path)
+            if template is None or template.is_stale():
+                template = compile_template(path, self.transform)
+                self.__templates[path] = template
+            return template
@@ -0,0 +1,100 @@
+import json
+import os
+import struct
+import tempfile
+from io import BytesIO
+from unittest import TestCase
+
+from assets import MANIFEST_NAME, Assets, read_image_size
+
+
+def png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\x00" * 64
+
+
+def jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x00" * 10
+    return b"\xff\xd8" + app0 + b"\xff\xff" + sof0 + b"\xff\xd9"
+
+
+class TestReadImageSize(TestCase):
+    def test_read_image_size(self):
+        cases = [
+            (png(640, 480), (640, 480)),
+            (b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 20, (32, 16)),
+            (jpeg(1920, 1080), (1920, 1080)),
+            (b"\xff\xd8\xff\xe0\x00\x10", None),  # truncated jpeg
+            (b"not an image at all", None),
+            (b"", None),
+        ]
+        for data, expected in cases:
+            self.assertEqual(read_image_size(BytesIO(data)), expected, data[:10])
+
+
+class TestAssets(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "cat.png"), "wb") as f:
+            f.write(png(20, 10))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rewrite_images(self):
+        assets = Assets(self.static)
+        html = '<p><img src="/images/cat.png" alt="cat"> and <img src="https://x/y.png" alt="remote"></p>'
+        self.assertEqual(
+            assets.rewrite_images(html),
+            '<p><img src="/images/cat.png" alt="cat" width="20" height="10" loading="lazy">'
+            + ' and <img src="https://x/y.png" alt="remote" loading="lazy"></p>',
+        )
+        self.assertEqual(assets.rewrite_images("<p>no images</p>"), "<p>no images</p>")
+
+    def test_sizes_are_cached_by_content(self):
+        assets = Assets(self.static)
+        assets.image_size("/images/cat.png")
+        assets.cache.hits = assets.cache.misses = 0
+        assets.image_size("/images/cat.png")
+        # file hash and size both come from the cache
+        self.assertEqual((assets.cache.hits, assets.cache.misses), (2, 0))
+
+    def test_hash_names(self):
+        assets = Assets(self.static, hash_names=True)
+        hashed = assets.asset_url("/images/cat.png")
+        self.assertRegex(hashed, r"^/images/cat\.[0-9a-f]{10}\.png$")
+        self.assertEqual(assets.asset_url("/images/missing.png"), "/images/missing.png")
+        self.assertEqual(
+            Assets(self.static).asset_url("/images/cat.png"), "/images/cat.png"
+        )
+
+        out = os.path.join(self.tmp.name, "out")
+        os.makedirs(out)
+        assets.copy_fingerprinted(os.path.join(self.static, "images", "cat.png"), out)
+        self.assertTrue(os.path.isfile(os.path.join(out, hashed.split("/")[-1])))
+        assets.write_manifest(out)
+        with open(os.path.join(out, MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), {"/images/cat.png": hashed})
+
+    def test_hashes_are_cached_by_mtime_and_size(self):
+        assets = Assets(self.static, hash_names=True)
+        path = os.path.join(self.static, "images", "cat.png")
+        first = assets.hash_of(path)
+        assets.hash_of(path)
+        self.assertEqual((assets.cache.hits, assets.cache.misses), (1, 1))
+
+        with open(path, "ab") as f:
+            f.write(b"more")
+        self.assertNotEqual(assets.hash_of(path), first)
+
+    def test_path_of_stays_in_static_dir(self):
+        assets = Assets(self.static)
+        self.assertIsNotNone(assets.path_of("/images/cat.png"))
+        with open(os.path.join(self.tmp.name, "secret.png"), "wb") as f:
+            f.write(png(1, 1))
+        self.assertIsNone(assets.path_of("/../secret.png"))
+        self.assertIsNone(assets.path_of("//cdn.example.com/images/cat.png"))
+        self.assertIsNone(assets.path_of("/images/dog.png"))
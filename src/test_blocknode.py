@@ -1,6 +1,7 @@
+from io import StringIO
 from unittest import TestCase
 
-from blocknode import BlockNode, text_to_blocks
+from blocknode import BlockNode, Document, Heading, read_blocks, text_to_blocks
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
 
@@ -95,3 +96,60 @@ This is a paragraph of text. It has some **bold** and _italic_ words inside of i
             ),
         ]
         self.assertListEqual(text_to_blocks(input), expected)
+
+    def test_plain_text(self):
+        cases = [
+            ("# **head**_ing_", "heading"),
+            ("a [link](/x) and `code`", "a link and code"),
+            ("- one\n- _two_", "one two"),
+        ]
+        for input, expected in cases:
+            self.assertEqual(BlockNode(input).plain_text(), expected)
+
+
+class TestDocument(TestCase):
+    def test_headings(self):
+        doc = Document(
+            "## intro\n\ntext\n\n# The **Title**\n\n# second h1\n\n###### tiny"
+        )
+        self.assertEqual(doc.title, "The Title")
+        self.assertListEqual(
+            doc.headings,
+            [
+                Heading(2, "intro", 0, "intro"),
+                Heading(1, "The Title", 2, "the-title"),
+                Heading(1, "second h1", 3, "second-h1"),
+                Heading(6, "tiny", 4, "tiny"),
+            ],
+        )
+
+    def test_no_title(self):
+        doc = Document("## not a title\n\njust text")
+        self.assertIsNone(doc.title)
+        self.assertEqual(len(doc.blocks), 2)
+
+    def test_heading_ids(self):
+        doc = Document("# Intro\n\n## Intro\n\ntext\n\n### intro")
+        self.assertListEqual(
+            [b.id for b in doc.blocks], ["intro", "intro-1", None, "intro-2"]
+        )
+        self.assertEqual(
+            doc.blocks[1].to_html_node(),
+            ParentNode("h2", [LeafNode(None, "Intro")], {"id": "intro-1"}),
+        )
+
+    def test_read_blocks(self):
+        for md in ["", "a", "a\n\nb", "a\n\n\n\nb\n\n", "# x\n- y\n\n\nz" * 5]:
+            for chunk_size in [1, 2, 3, 100]:
+                self.assertEqual(
+                    list(read_blocks(StringIO(md), chunk_size)),
+                    md.split("\n\n"),
+                    (md, chunk_size),
+                )
+                # the same with its first line already read
+                start = StringIO(md).readline()
+                self.assertEqual(
+                    list(read_blocks(StringIO(md[len(start) :]), chunk_size, start)),
+                    md.split("\n\n"),
+                    (md, chunk_size),
+                )
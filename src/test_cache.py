@@ -0,0 +1,49 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from cache import JsonCache, content_hash
+
+
+class TestJsonCache(TestCase):
+    def test_get_set(self):
+        cache = JsonCache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", [1, 2])
+        self.assertEqual(cache.get("a"), [1, 2])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_persists_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "nested", "cache.json")
+            cache = JsonCache(path, "1")
+            cache.set("a", "b")
+            cache.save()
+
+            self.assertEqual(JsonCache(path, "1").get("a"), "b")
+            # other versions start from scratch
+            self.assertIsNone(JsonCache(path, "2").get("a"))
+
+    def test_save_drops_unused_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            cache = JsonCache(path)
+            cache.set("old", 1)
+            cache.set("kept", 2)
+            cache.save()
+
+            cache = JsonCache(path)
+            cache.get("kept")
+            cache.save()
+            self.assertEqual(len(JsonCache(path)), 1)
+
+    def test_broken_file_is_empty_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            with open(path, "w") as f:
+                f.write("{not json")
+            self.assertEqual(len(JsonCache(path)), 0)
+
+    def test_content_hash(self):
+        self.assertEqual(content_hash("hi"), content_hash("hi"))
+        self.assertNotEqual(content_hash("hi"), content_hash("ho"))
@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest import TestCase
+
+from frontmatter import front_matter_date, read_front_matter, split_front_matter
+
+
+class TestFrontMatter(TestCase):
+    def test_split_front_matter(self):
+        cases = [
+            ("# no front matter", {}, "# no front matter"),
+            (
+                "---\ntitle: Hello: World\ndraft: true\n---\n# body",
+                {"title": "Hello: World", "draft": True},
+                "# body",
+            ),
+            (
+                '+++\n# comment\ntitle = "quoted = fine"\n\norder = 3\n+++\nbody',
+                {"title": "quoted = fine", "order": 3},
+                "body",
+            ),
+            ("---\n---\nbody", {}, "body"),
+        ]
+        for text, meta, body in cases:
+            self.assertEqual(split_front_matter(text), (meta, body), text)
+
+    def test_read_front_matter_stops_at_body(self):
+        f = StringIO("---\ntitle: hi\n---\n# the body\n\nmore body")
+        self.assertEqual(read_front_matter(f), {"title": "hi"})
+        self.assertEqual(f.read(), "# the body\n\nmore body")
+
+    def test_invalid_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle hi\n---\nbody")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: hi\n# body")
+
+    def test_front_matter_date(self):
+        self.assertEqual(front_matter_date({"date": "1970-01-02"}), 86400)
+        self.assertEqual(
+            front_matter_date({"date": "1970-01-02T01:00:00+01:00"}), 86400
+        )
+        self.assertIsNone(front_matter_date({}))
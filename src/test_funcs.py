@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from funcs import slugify, unique_slug
+
+
+class TestSlugs(TestCase):
+    def test_slugify(self):
+        cases = [
+            ("Hello World", "hello-world"),
+            ("Why Tom? (part 2)", "why-tom-part-2"),
+            ("  spaced   out  ", "spaced-out"),
+            ("snake_case-and-kebab", "snake-case-and-kebab"),
+            ("Váya márië", "váya-márië"),
+            ("???", "section"),
+        ]
+        for text, expected in cases:
+            self.assertEqual(slugify(text), expected, text)
+
+    def test_unique_slug(self):
+        seen: dict[str, int] = {}
+        slugs = [unique_slug(t, seen) for t in ("a", "a", "a-1", "A", "b")]
+        self.assertListEqual(slugs, ["a", "a-1", "a-1-1", "a-2", "b"])
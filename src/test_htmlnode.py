@@ -1,4 +1,5 @@
 import unittest
+from collections.abc import MutableSequence
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -127,6 +128,16 @@ class HTMLNodeTest(unittest.TestCase):
                 f"{a} == {b}",
             )
 
+    def test_default_children_are_not_shared(self):
+        # nodes are shared between threads and the fragment caches, a node made
+        # with the default children mustn't be able to change any other node's
+        for make in [HTMLNode, lambda: ParentNode("div"), lambda: LeafNode("p", "")]:
+            a, b = make(), make()
+            self.assertFalse(
+                a.children is b.children and isinstance(a.children, MutableSequence),
+                type(a).__name__,
+            )
+
 
 class LeafNodeTest(unittest.TestCase):
     def test_to_html(self):
@@ -0,0 +1,120 @@
+import time
+from typing import Callable
+from unittest import TestCase
+
+from enums import TextType
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from mdparser import markdown_to_html, markdown_to_html_fast
+from textnode import (
+    TextNode,
+    split_nodes_delimiter,
+    split_nodes_images,
+    split_nodes_links,
+    text_to_nodes,
+)
+
+# pages are user written, so these are the inputs someone could use to stall a build,
+# repeated to any length. most of them used to make something in the parsers quadratic
+ADVERSARIAL = {
+    "stars": "*",
+    "unclosed emphasis": "*a",
+    "emphasis": "*a* ",
+    "unclosed bold": "**a",
+    "underscores": "_",
+    "backticks": "`",
+    "brackets": "[",
+    "unclosed links": "[a](",
+    "empty links": "[a]()",
+    "links": "[a](b) ",
+    "images": "![a](b) ",
+    "newlines": "\n",
+    "blocks": "a\n\n",
+    "fences": "```\n",
+    "lists": "- a\n",
+}
+
+# input sizes, in chars. linear code takes about as long per char at the largest as
+# at the smallest, quadratic code 64x as long. the largest can go up to 1_000_000 to
+# check a change to the parsers more thoroughly, that takes a few minutes
+SIZES = (1_000, 64_000)
+# how much longer per char the largest may take before it counts as superlinear,
+# room for timer noise and cache effects while far below what quadratic code gives
+SLACK = 4
+
+
+# the best time per call, called enough times that a single call on a small input
+# isn't down in the timer's noise
+def _time_per_call(f: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(2):
+        calls = 0
+        start = time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < 0.002:
+            f()
+            calls += 1
+        best = min(best, elapsed / calls)
+    return best
+
+
+def _deep_tree(depth: int) -> HTMLNode:
+    node: HTMLNode = LeafNode("b", "x")
+    for _ in range(depth):
+        node = ParentNode("span", [node])
+    return node
+
+
+def _wide_tree(width: int) -> HTMLNode:
+    return ParentNode("ul", [ParentNode("li", [LeafNode("b", "x")])] * width)
+
+
+class TestLinearTime(TestCase):
+    def assert_linear[T](
+        self, name: str, make_input: Callable[[int], T], f: Callable[[T], object]
+    ):
+        small, large = SIZES
+        small_input, large_input = make_input(small), make_input(large)
+        ratio = (
+            _time_per_call(lambda: f(large_input))
+            / _time_per_call(lambda: f(small_input))
+            / (large / small)
+        )
+        self.assertLess(
+            ratio,
+            SLACK,
+            f"{name}: took {ratio:.1f}x as long per char for {large} chars as for "
+            f"{small}, superlinear (quadratic?) on this input",
+        )
+
+    def assert_linear_on_markdown(self, parse: Callable[[str], object]):
+        for name, unit in ADVERSARIAL.items():
+            with self.subTest(name):
+                self.assert_linear(name, lambda n: unit * (n // len(unit)), parse)
+
+    def test_split_nodes_delimiter(self):
+        for delimiter, node_type in [
+            ("**", TextType.BOLD),
+            ("*", TextType.ITALIC),
+            ("_", TextType.ITALIC),
+            ("`", TextType.CODE),
+        ]:
+            self.assert_linear_on_markdown(
+                lambda md: split_nodes_delimiter([TextNode(md)], delimiter, node_type)
+            )
+
+    def test_links_and_images(self):
+        self.assert_linear_on_markdown(lambda md: split_nodes_links([TextNode(md)]))
+        self.assert_linear_on_markdown(lambda md: split_nodes_images([TextNode(md)]))
+
+    def test_text_to_nodes(self):
+        self.assert_linear_on_markdown(text_to_nodes)
+
+    def test_markdown(self):
+        self.assert_linear_on_markdown(markdown_to_html)
+        self.assert_linear_on_markdown(markdown_to_html_fast)
+
+    def test_find_all(self):
+        # sizes in nodes here
+        find_spans = lambda tree: tree.find_all("span")
+        self.assert_linear("deep tree", lambda n: _deep_tree(n // 10), find_spans)
+        self.assert_linear("wide tree", lambda n: _wide_tree(n // 10), find_spans)
+        self.assertEqual(len(_deep_tree(10_000).find_all("span")), 10_000)
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from listings import PageInfo, Site
+
+
+def blog_site(count: int) -> Site:
+    site = Site("/base/", "https://example.com")
+    site.add_page(PageInfo("/", "Home & Garden", 0))
+    for i in range(count):
+        site.add_page(PageInfo(f"/blog/post-{i}/", f"Post {i}", 86400 * (i + 1)))
+    return site
+
+
+class TestSite(TestCase):
+    def test_section(self):
+        site = blog_site(3)
+        site.add_page(PageInfo("/blog/", "Blog", 0))
+        self.assertListEqual(
+            [p.url for p in site.section("blog")],
+            ["/blog/post-0/", "/blog/post-1/", "/blog/post-2/"],
+        )
+
+    def test_listing_pages(self):
+        pages = list(blog_site(5).listing_pages("blog", per_page=2))
+        self.assertListEqual(
+            [path for path, _title, _html in pages],
+            [
+                "blog/index.html",
+                "blog/page/1/index.html",
+                "blog/page/2/index.html",
+                "blog/page/3/index.html",
+            ],
+        )
+        _path, title, html = pages[0]
+        self.assertEqual(title, "Blog")
+        # newest first
+        self.assertLess(html.index("Post 4"), html.index("Post 3"))
+        self.assertNotIn("Post 2", html)
+        self.assertIn('<time datetime="1970-01-06T00:00:00Z">1970-01-06</time>', html)
+
+    def test_listing_pages_only_rerender_what_changed(self):
+        site = blog_site(5)
+        list(site.listing_pages("blog", per_page=2))
+        site.cache.hits = site.cache.misses = 0
+
+        # archive pages are numbered from the oldest post, so a new post leaves
+        # the full archive pages alone
+        site.add_page(PageInfo("/blog/new/", "New", 86400 * 10))
+        list(site.listing_pages("blog", per_page=2))
+        self.assertEqual((site.cache.hits, site.cache.misses), (2, 2))
+
+    def test_listing_pages_keep_written_index(self):
+        site = blog_site(1)
+        site.add_page(PageInfo("/blog/", "My Blog", 0))
+        paths = [path for path, _title, _html in site.listing_pages("blog")]
+        self.assertListEqual(paths, ["blog/page/1/index.html"])
+
+    def test_sitemap_and_feed(self):
+        site = blog_site(2)
+        with tempfile.TemporaryDirectory() as tmp:
+            site.write_sitemap(tmp)
+            site.write_feed(tmp, "blog", site.home_title())
+            with open(os.path.join(tmp, "sitemap.xml")) as f:
+                sitemap = f.read()
+            with open(os.path.join(tmp, "blog", "feed.xml")) as f:
+                feed = f.read()
+            site.write_feed(tmp, "blog", site.home_title(), author="Tom")
+            with open(os.path.join(tmp, "blog", "feed.xml")) as f:
+                authored_feed = f.read()
+
+        self.assertIn("<loc>https://example.com/base/blog/post-1/</loc>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 3)
+        self.assertIn("<title>Home &amp; Garden</title>", feed)
+        self.assertIn('<link href="https://example.com/base/blog/post-1/"/>', feed)
+        self.assertIn("<updated>1970-01-03T00:00:00Z</updated>", feed)
+        self.assertIn("<author><name>Home &amp; Garden</name></author>", feed)
+        self.assertIn("<author><name>Tom</name></author>", authored_feed)
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# what a one off render shouldn't be loading, it's only needed by other modes
+SLOW_IMPORTS = [
+    "http.server",
+    "multiprocessing",
+    "concurrent.futures",
+    "shutil",
+    "hashlib",
+    "xml.sax",
+]
+
+# prints what running main.py with args imported, besides what python itself did
+_SCRIPT = """
+import sys
+before = set(sys.modules)
+sys.path.insert(0, sys.argv[1])
+sys.argv = ["main.py", *sys.argv[2:]]
+import main
+main.main()
+print(*sorted(set(sys.modules) - before), file=sys.stderr)
+"""
+
+
+class TestMain(TestCase):
+    def test_render_imports_only_what_it_needs(self):
+        page = os.path.join(SRC_DIR, "..", "content", "index.md")
+        result = subprocess.run(
+            [sys.executable, "-c", _SCRIPT, SRC_DIR, "render", page],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertIn("<h1", result.stdout)
+        imported = result.stderr.split()
+        self.assertIn("mdparser", imported)
+        for module in SLOW_IMPORTS:
+            self.assertNotIn(module, imported)
+
+    def test_bad_workers(self):
+        for flag in ["--workers", "--workers=", "--workers=two", "--workers=0"]:
+            result = subprocess.run(
+                [sys.executable, os.path.join(SRC_DIR, "main.py"), flag],
+                capture_output=True,
+                text=True,
+                cwd=SRC_DIR,
+            )
+            self.assertNotEqual(result.returncode, 0, flag)
+            self.assertIn("expected --workers=<number of threads>", result.stderr)
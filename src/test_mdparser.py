@@ -1,6 +1,22 @@
+import os
 from unittest import TestCase
 
-from mdparser import extract_title, markdown_to_html, markdown_to_html_node
+from blocknode import Document, Heading
+from cache import content_hash
+
+from mdparser import (
+    MarkdownError,
+    extract_title,
+    fragment_cache,
+    markdown_to_html,
+    markdown_to_html_fast,
+    markdown_to_html_node,
+    render_many,
+    render_markdown,
+    toc_html,
+)
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
 
 
 class TestMarkdownParser(TestCase):
@@ -48,3 +64,120 @@ the **same** even with inline stuff
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff</code></pre></div>",
         )
+
+
+class TestFastRenderer(TestCase):
+    def test_matches_tree_renderer_on_content(self):
+        checked = 0
+        for dirpath, _dirs, files in os.walk(CONTENT_DIR):
+            for f in files:
+                with open(os.path.join(dirpath, f)) as mdf:
+                    md = mdf.read()
+                self.assertEqual(markdown_to_html_fast(md), markdown_to_html(md), f)
+                checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_matches_tree_renderer(self):
+        cases = [
+            "",
+            '# <script>alert("hi")</script>',
+            "###### **bold** _em_ *em* `code`",
+            "> quoted\n>\n> lines",
+            '- one [link](/a?b="c")\n- two ![img](/i.png)',
+            "1. first\n2. second",
+            "```\n<b>raw</b> **not bold**\n```",
+            "para one\nstill one\n\npara two",
+            "# Same\n\n## Same\n\n## same-1\n\n### Same",
+        ]
+        for md in cases:
+            self.assertEqual(markdown_to_html_fast(md), markdown_to_html(md), md)
+
+    def test_render_markdown_title(self):
+        cases = [
+            ("# hi\n\n# bye", "hi"),
+            ("## sub\n\n# **hi**", "hi"),
+            ("![img](/i.png)\n\n# hi", "hi"),
+            # no longer limited to a single text node
+            ("# **hi** there `you`", "hi there you"),
+            ("## hi", None),
+        ]
+        for md, expected in cases:
+            self.assertEqual(render_markdown(md).title, expected, md)
+
+    def test_render_markdown_headings(self):
+        md = "# title\n\n\n\n\n\nintro\n\n## part _one_\n\ntext\n\n### deeper"
+        self.assertListEqual(
+            render_markdown(md).headings,
+            [
+                Heading(1, "title", 0, "title"),
+                Heading(2, "part one", 2, "part-one"),
+                Heading(3, "deeper", 4, "deeper"),
+            ],
+        )
+        self.assertListEqual(render_markdown(md).headings, Document(md).headings)
+
+    def test_render_markdown_with_cache(self):
+        md = "# hi\n\nfirst **para**\n\n- a\n- b\n\nlast para"
+        cache = fragment_cache()
+        self.assertEqual(render_markdown(md, cache), render_markdown(md))
+        self.assertEqual(cache.misses, 4)
+
+        # only the edited block is rendered again
+        edited = md.replace("first", "second")
+        self.assertEqual(render_markdown(edited, cache), render_markdown(edited))
+        self.assertEqual(cache.misses, 5)
+        self.assertEqual(cache.hits, 3)
+
+    def test_render_markdown_error_line(self):
+        md = "# hi\n\n\n\nsecond\nstill\n\n\nbad"
+        cache = fragment_cache()
+        cache.set(content_hash("bad"), ["broken"])
+        with self.assertRaises(MarkdownError) as cm:
+            render_markdown(md, cache)
+        self.assertEqual(cm.exception.line, 9)
+
+    def test_render_many(self):
+        docs = [f"# doc {i}\n\nsame **boilerplate** [home](/)" for i in range(20)]
+        expected = list(enumerate(map(markdown_to_html, docs)))
+        self.assertEqual(list(render_many(docs, workers=1)), expected)
+        self.assertEqual(list(render_many(iter(docs), 2, chunksize=3)), expected)
+        unordered = render_many(docs, 2, chunksize=1, ordered=False)
+        self.assertEqual(sorted(unordered), expected)
+        self.assertEqual(list(render_many([], 2)), [])
+
+
+class TestTableOfContents(TestCase):
+    def test_toc_html(self):
+        cases = [
+            ([], ""),
+            (
+                [Heading(1, "a", 0, "a"), Heading(1, "b <3", 1, "b-3")],
+                '<ul><li><a href="#a">a</a></li><li><a href="#b-3">b &lt;3</a></li></ul>',
+            ),
+            (
+                [
+                    Heading(1, "a", 0, "a"),
+                    Heading(2, "b", 1, "b"),
+                    Heading(1, "c", 2, "c"),
+                ],
+                '<ul><li><a href="#a">a</a><ul><li><a href="#b">b</a></li></ul></li>'
+                + '<li><a href="#c">c</a></li></ul>',
+            ),
+            # skipped levels still nest one step at a time
+            (
+                [
+                    Heading(1, "a", 0, "a"),
+                    Heading(3, "b", 1, "b"),
+                    Heading(2, "c", 2, "c"),
+                ],
+                '<ul><li><a href="#a">a</a><ul><li><a href="#b">b</a></li>'
+                + '<li><a href="#c">c</a></li></ul></li></ul>',
+            ),
+            # starting deeper than later headings
+            (
+                [Heading(2, "a", 0, "a"), Heading(1, "b", 1, "b")],
+                '<ul><li><a href="#a">a</a></li><li><a href="#b">b</a></li></ul>',
+            ),
+        ]
+        for headings, expected in cases:
+            self.assertEqual(toc_html(headings), expected, headings)
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from minify import Minifier, minify_css, minify_html
+from templates import compile_template
+
+
+class TestMinifyHtml(TestCase):
+    def test_indentation(self):
+        html = """<!DOCTYPE html>
+<html>
+  <head>
+    <title><!--SSG_TITLE--></title>
+  </head>
+  <body>
+    <p>some   text
+      over lines</p> <b>a</b> <i>b</i>
+  </body>
+</html>
+"""
+        self.assertEqual(
+            minify_html(html),
+            "<!DOCTYPE html><html><head><title><!--SSG_TITLE--></title></head>"
+            "<body><p>some text over lines</p> <b>a</b> <i>b</i></body></html>",
+        )
+
+    def test_space_between_inline_tags(self):
+        # a newline between inline elements still shows as a space, so it's kept
+        cases = [
+            ("<p><a>x</a>\n<a>y</a></p>", "<p><a>x</a> <a>y</a></p>"),
+            ("<span>a</span>\n  <span>b</span>", "<span>a</span> <span>b</span>"),
+            ("<b>a</b>\n<!-- note -->\n<b>b</b>", "<b>a</b> <b>b</b>"),
+            (
+                "<ul>\n  <li><a>x</a></li>\n  <li>y</li>\n</ul>",
+                "<ul><li><a>x</a></li><li>y</li></ul>",
+            ),
+        ]
+        for html, expected in cases:
+            self.assertEqual(minify_html(html), expected, html)
+
+    def test_comments(self):
+        self.assertEqual(
+            minify_html("<p>a<!-- note --></p><!--[if IE]>x<![endif]--><!--SSG_TOC-->"),
+            "<p>a</p><!--[if IE]>x<![endif]--><!--SSG_TOC-->",
+        )
+
+    def test_raw_tags(self):
+        html = "<div>\n  <pre><code>x  =  1\n    y</code></pre>\n  <SCRIPT>\nlet  a;\n</SCRIPT>\n</div>"
+        self.assertEqual(
+            minify_html(html),
+            "<div><pre><code>x  =  1\n    y</code></pre><SCRIPT>\nlet  a;\n</SCRIPT></div>",
+        )
+        # an unclosed raw tag keeps everything after it
+        self.assertEqual(minify_html("<pre> a\n  b"), "<pre> a\n  b")
+
+    def test_templates(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "t.html")
+            with open(path, "w") as f:
+                f.write(
+                    "<html>\n  <!-- hi -->\n  <title><!--SSG_TITLE--></title>\n</html>\n"
+                )
+            template = compile_template(path, minify_html)
+            self.assertEqual(
+                template.render({"TITLE": "a  b"}), "<html><title>a  b</title></html>"
+            )
+
+
+class TestMinifyCss(TestCase):
+    def test_whitespace(self):
+        css = """/* the nav */
+body > nav ,  a:hover {
+    color : red;
+    margin: 0 auto;
+}
+
+@media (max-width: 600px) and (min-width: 10px) {
+    p { width: calc(100% - 2px); }
+}
+"""
+        self.assertEqual(
+            minify_css(css),
+            "body>nav,a:hover{color :red;margin:0 auto}"
+            "@media (max-width:600px) and (min-width:10px){p{width:calc(100% - 2px)}}",
+        )
+
+    def test_strings(self):
+        self.assertEqual(
+            minify_css("a::after { content: \"  /* no */ ;}  \"; b: 'x\\' y' }"),
+            "a::after{content:\"  /* no */ ;}  \";b:'x\\' y'}",
+        )
+
+
+class TestMinifier(TestCase):
+    def test_cached(self):
+        minifier = Minifier()
+        self.assertEqual(minifier.css("a { b: c; }"), "a{b:c}")
+        self.assertEqual(minifier.css("a { b: c; }"), "a{b:c}")
+        self.assertEqual(minifier.html("<p>\n</p>"), "<p></p>")
+        self.assertEqual(minifier.cache.hits, 1)
+        self.assertEqual(minifier.cache.misses, 2)
@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from htmlnode import LeafNode, ParentNode
+from mdparser import markdown_to_html_node
+from nodepool import NodePool
+from urls import base_path_resolver
+
+NAV = "- [home](/)\n- [blog](/blog/)"
+
+
+class TestNodePool(TestCase):
+    def test_identical_subtrees_are_shared(self):
+        pool = NodePool()
+        a = markdown_to_html_node(f"{NAV}\n\n# one", pool)
+        b = markdown_to_html_node(f"{NAV}\n\n# two", pool)
+        self.assertIs(a.children[0], b.children[0])
+        self.assertIsNot(a.children[1], b.children[1])
+        self.assertIs(pool.intern(a), a)
+        self.assertGreater(pool.hits, 0)
+
+    def test_same_html(self):
+        md = f"{NAV}\n\nsome **bold** and `code` ![cat](/cat.png)"
+        plain = markdown_to_html_node(md)
+        interned = markdown_to_html_node(md, NodePool())
+        self.assertEqual(interned.to_html(), plain.to_html())
+        # the memoized html is for the urls as they are, resolvers still apply
+        resolve = base_path_resolver("/base/")
+        self.assertEqual(interned.to_html(resolve), plain.to_html(resolve))
+        self.assertEqual(interned.to_html(), plain.to_html())
+
+    def test_immutable(self):
+        pool = NodePool()
+        node = pool.parent("p", [pool.leaf("a", "x", {"href": "/"})])
+        with self.assertRaises(AttributeError):
+            node.tag = "div"
+        with self.assertRaises(AttributeError):
+            node.children[0].value = "y"
+        with self.assertRaises(TypeError):
+            node.children[0].props["href"] = "/other"  # type: ignore[index]
+
+    def test_html_is_memoized(self):
+        pool = NodePool()
+        node = pool.parent("p", [pool.leaf(None, "x")])
+        self.assertIs(node.to_html(), node.to_html())
+
+    def test_equality(self):
+        pool = NodePool()
+        plain = ParentNode("ul", [LeafNode("li", "one"), LeafNode("li", "two")])
+        interned = pool.intern(plain)
+        self.assertEqual(interned, plain)
+        self.assertEqual(plain, interned)
+        self.assertEqual(hash(interned), hash(pool.intern(plain)))
+
+        other = pool.parent("ul", [pool.leaf("li", "one"), pool.leaf("li", "three")])
+        self.assertNotEqual(interned.structural_hash, other.structural_hash)
+        self.assertNotEqual(interned, other)
+        self.assertEqual(len(pool), 5)
+
+    def test_props_are_part_of_the_key(self):
+        pool = NodePool()
+        a = pool.leaf("a", "x", {"href": "/a"})
+        self.assertIs(pool.leaf("a", "x", {"href": "/a"}), a)
+        self.assertIsNot(pool.leaf("a", "x", {"href": "/b"}), a)
+        self.assertEqual((pool.hits, pool.misses), (1, 2))
+
+    def test_props_order_doesnt_matter(self):
+        props = {"href": "/a", "title": "A"}
+        reordered = {"title": "A", "href": "/a"}
+        plain = [LeafNode("a", "x", props), LeafNode("a", "x", reordered)]
+        self.assertEqual(*plain)
+        a, b = NodePool().intern(plain[0]), NodePool().intern(plain[1])
+        self.assertEqual(a.structural_hash, b.structural_hash)
+        self.assertEqual(a, b)
+        pool = NodePool()
+        self.assertIs(pool.intern(plain[0]), pool.intern(plain[1]))
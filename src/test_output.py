@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from output import (
+    BUILD_MANIFEST_NAME,
+    BUILD_REPORT_NAME,
+    BuildReport,
+    Output,
+    copy_file,
+    write_file,
+)
+
+
+class TestOutput(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *names: str) -> str:
+        return os.path.join(self.dir, *names)
+
+    def test_write_file(self):
+        path = self.path("a", "b.html")
+        self.assertTrue(write_file(path, "<p>hi</p>"))
+        os.utime(path, (1, 1))
+        # same content, so the file (and its mtime) is left alone
+        self.assertFalse(write_file(path, b"<p>hi</p>"))
+        self.assertEqual(os.path.getmtime(path), 1)
+        # same size, different content
+        self.assertTrue(write_file(path, "<p>yo</p>"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "<p>yo</p>")
+        self.assertEqual(os.listdir(self.path("a")), ["b.html"])
+
+    def test_copy_file(self):
+        src = self.path("src.css")
+        write_file(src, "body {}")
+        self.assertTrue(copy_file(src, self.path("out", "index.css")))
+        self.assertFalse(copy_file(src, self.path("out", "index.css")))
+        write_file(src, "body { color: red; }")
+        self.assertTrue(copy_file(src, self.path("out", "index.css")))
+
+    def test_prune(self):
+        root = self.path("out")
+        write_file(self.path("out", "old", "index.html"), "old")
+        write_file(self.path("out", "index.html"), "old")
+        output = Output(root)
+        output.write(self.path("out", "index.html"), "old")
+        output.write(self.path("out", "new", "index.html"), "new")
+        self.assertEqual((output.changed, output.unchanged), (1, 1))
+        self.assertEqual(output.prune(), [self.path("out", "old", "index.html")])
+        self.assertEqual(sorted(os.listdir(root)), ["index.html", "new"])
+
+    def test_report(self):
+        root = self.path("out")
+        output = Output(root)
+        output.write(self.path("out", "index.html"), "one")
+        output.write(self.path("out", "blog", "a.html"), "a")
+        output.write(self.path("out", "gone.html"), "gone")
+        report = output.save()
+        self.assertEqual(report.added, ["blog/a.html", "gone.html", "index.html"])
+        self.assertTrue(os.path.isfile(self.path("out", BUILD_MANIFEST_NAME)))
+
+        output = Output(root)
+        output.write(self.path("out", "index.html"), "one more")
+        output.write(self.path("out", "blog", "a.html"), "a")
+        output.write(self.path("out", "new.html"), "new")
+        report = output.save()
+        self.assertEqual(
+            report,
+            BuildReport(
+                ["new.html"], {"index.html": 5}, ["gone.html"], ["blog/a.html"]
+            ),
+        )
+        # the manifest and report are output too, so they survive pruning
+        self.assertEqual(output.prune(), [self.path("out", "gone.html")])
+        with open(self.path("out", BUILD_REPORT_NAME)) as f:
+            self.assertEqual(json.load(f)["changed"], {"index.html": 5})
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from search import MAX_TERM_LENGTH, SearchIndex, tokenize
+
+
+class TestTokenize(TestCase):
+    def test_tokenize(self):
+        cases: list[tuple[list[str], list[str]]] = [
+            ([], []),
+            (["Hello, World!"], ["hello", "world"]),
+            (["a bc", "d-ef"], ["bc", "ef"]),
+            (["Váya márië"], ["váya", "márië"]),
+            (["555-555-5555"], ["555", "555", "5555"]),
+            (["x" * 100], ["x" * MAX_TERM_LENGTH]),
+        ]
+        for texts, expected in cases:
+            self.assertListEqual(list(tokenize(texts)), expected, texts)
+
+
+class TestSearchIndex(TestCase):
+    def test_add_page(self):
+        index = SearchIndex()
+        index.add_page("/", "Home", ["hobbits are hobbits", "elves"])
+        index.add_page("/blog/", "Blog", ["elves"])
+        self.assertEqual(index.pages, [("/", "Home"), ("/blog/", "Blog")])
+        self.assertEqual(index.postings["hobbits"], [(0, 2)])
+        self.assertEqual(index.postings["elves"], [(0, 1), (1, 1)])
+
+    def test_write(self):
+        index = SearchIndex()
+        index.add_page("/", "Home", ["elves eat elderberries", "hobbits"])
+        with tempfile.TemporaryDirectory() as tmp:
+            index.write(tmp)
+            with open(os.path.join(tmp, "index.json")) as f:
+                manifest = json.load(f)
+            self.assertEqual(manifest["pages"], [["/", "Home"]])
+            index.write(tmp, base_path="/base/")
+            with open(os.path.join(tmp, "index.json")) as f:
+                self.assertEqual(json.load(f)["pages"], [["/base/", "Home"]])
+            self.assertListEqual(sorted(manifest["shards"]), ["ea", "el", "ho"])
+            with open(os.path.join(tmp, "el.json")) as f:
+                self.assertEqual(
+                    json.load(f), {"elderberries": [[0, 1]], "elves": [[0, 1]]}
+                )
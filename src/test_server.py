@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+from unittest import TestCase
+
+from server import PreviewSite, make_server
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        os.makedirs(os.path.join(self.content, "blog", "tom"))
+        os.makedirs(self.static)
+        self.write("content/index.md", "# Home\n\n[tom](/blog/tom/)")
+        self.write("content/blog/tom/index.md", "# Tom")
+        self.write("content/contact.md", "---\ntitle: Contact\n---\nhi")
+        self.write("content/broken.md", "no title")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", '<link href="/index.css"><!--SSG_TARGET-->')
+        self.site = PreviewSite(
+            os.path.join(root, "template.html"),
+            self.content,
+            self.static,
+            "/bdev-ssg/",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, text: str):
+        path = os.path.join(self.tmp.name, rel_path)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_pages(self):
+        response = self.site.get("/bdev-ssg/?x=1")
+        self.assertEqual(response.status, HTTPStatus.OK)
+        self.assertEqual(
+            response.body.decode(),
+            '<link href="/bdev-ssg/index.css"><div><h1 id="home">Home</h1>'
+            + '<p><a href="/bdev-ssg/blog/tom/">tom</a></p></div>',
+        )
+        self.assertEqual(response.headers["Content-Type"], "text/html; charset=utf-8")
+        self.assertEqual(self.site.get("/bdev-ssg/blog/tom/").status, HTTPStatus.OK)
+        self.assertEqual(self.site.get("/bdev-ssg/contact.html").status, HTTPStatus.OK)
+
+        redirect = self.site.get("/bdev-ssg/blog/tom")
+        self.assertEqual(redirect.status, HTTPStatus.MOVED_PERMANENTLY)
+        self.assertEqual(redirect.headers["Location"], "/bdev-ssg/blog/tom/")
+
+        for url in ["/", "/bdev-ssg/nope.html", "/bdev-ssg/../template.html"]:
+            self.assertEqual(self.site.get(url).status, HTTPStatus.NOT_FOUND, url)
+
+        error = self.site.get("/bdev-ssg/broken.html")
+        self.assertEqual(error.status, HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.assertIn(b"no title or h1", error.body)
+
+    def test_static_files(self):
+        response = self.site.get("/bdev-ssg/index.css")
+        self.assertEqual(response.status, HTTPStatus.OK)
+        self.assertEqual(response.body, b"body {}")
+        self.assertEqual(response.headers["Content-Type"], "text/css; charset=utf-8")
+        etag = response.headers["ETag"]
+        self.assertEqual(
+            self.site.get("/bdev-ssg/index.css", etag).status, HTTPStatus.NOT_MODIFIED
+        )
+
+    def test_etags(self):
+        etag = self.site.get("/bdev-ssg/").headers["ETag"]
+        not_modified = self.site.get("/bdev-ssg/", f'"other", {etag}')
+        self.assertEqual(not_modified.status, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(not_modified.body, b"")
+        self.assertEqual(self.site.get("/bdev-ssg/", '"other"').status, HTTPStatus.OK)
+
+    def test_cache(self):
+        first = self.site.get("/bdev-ssg/blog/tom/")
+        self.site.get("/bdev-ssg/blog/tom/")
+        self.assertEqual((self.site.hits, self.site.misses), (1, 1))
+
+        # edited pages are rendered again, with a new etag
+        path = self.write("content/blog/tom/index.md", "# Tom Bombadil")
+        os.utime(path, (0, 0))
+        edited = self.site.get("/bdev-ssg/blog/tom/", first.headers["ETag"])
+        self.assertEqual(edited.status, HTTPStatus.OK)
+        self.assertIn(b"Tom Bombadil", edited.body)
+        self.assertEqual(self.site.misses, 2)
+
+        # and so is everything once the template changes
+        path = self.write("template.html", "<main><!--SSG_TARGET--></main>")
+        os.utime(path, (0, 0))
+        self.assertTrue(self.site.get("/bdev-ssg/blog/tom/").body.startswith(b"<main>"))
+        self.assertEqual(self.site.misses, 3)
+
+    def test_least_recently_used_are_dropped(self):
+        self.site.max_pages = 2
+        for url in ["/bdev-ssg/", "/bdev-ssg/blog/tom/", "/bdev-ssg/"]:
+            self.site.get(url)
+        self.site.get("/bdev-ssg/contact.html")
+        self.site.get("/bdev-ssg/")
+        self.assertEqual(self.site.hits, 2)
+        self.site.get("/bdev-ssg/blog/tom/")
+        self.assertEqual(self.site.misses, 4)
+
+    def test_http(self):
+        server = make_server(self.site, 0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f"http://localhost:{server.server_address[1]}/bdev-ssg/blog/tom/"
+            with urllib.request.urlopen(url) as response:
+                self.assertIn(b'<h1 id="tom">Tom</h1>', response.read())
+                etag = response.headers["ETag"]
+            request = urllib.request.Request(url, headers={"If-None-Match": etag})
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(request)
+            self.assertEqual(e.exception.code, HTTPStatus.NOT_MODIFIED)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
@@ -0,0 +1,264 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from assets import HASH_LENGTH, Assets
+from cache import content_hash
+from listings import PageInfo, Site
+from mdparser import fragment_cache, markdown_to_html_fast
+from minify import Minifier
+from output import Output
+from search import SearchIndex
+from ssg import (
+    PageError,
+    Variant,
+    copy_dir,
+    generate_listings,
+    generate_pages,
+    page_url,
+    resolve_urls,
+    stream_page,
+)
+from templates import TemplateCache, compile_template
+
+
+class TestSSG(TestCase):
+    def test_page_url(self):
+        cases = [
+            ("public/index.html", "public", "/", "/"),
+            ("public/blog/tom/index.html", "public", "/", "/blog/tom/"),
+            (
+                "public/blog/tom/index.html",
+                "public",
+                "/bdev-ssg/",
+                "/bdev-ssg/blog/tom/",
+            ),
+            ("docs/about.html", "docs", "/bdev-ssg/", "/bdev-ssg/about.html"),
+        ]
+        for dest_path, root, base_path, expected in cases:
+            self.assertEqual(page_url(dest_path, root, base_path), expected)
+
+    def test_resolve_urls(self):
+        cases = [
+            ('<a href="/x">/x</a>', "/", '<a href="/x">/x</a>'),
+            (
+                '<link href="/index.css"><img src="/a.png" alt="/b"><a href="https://x">',
+                "/base/",
+                '<link href="/base/index.css"><img src="/base/a.png" alt="/b"><a href="https://x">',
+            ),
+            ('<p>title="/nope"</p>', "/base/", '<p>title="/nope"</p>'),
+            ('<a href="/unclosed', "/base/", '<a href="/unclosed'),
+        ]
+        for html, base_path, expected in cases:
+            self.assertEqual(resolve_urls(html, base_path), expected, html)
+
+    def test_resolve_urls_with_assets(self):
+        with tempfile.TemporaryDirectory() as static:
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {}")
+            assets = Assets(static, hash_names=True)
+            html = resolve_urls('<link href="/index.css"><a href="/x">', "/b/", assets)
+            hashed = assets.renamed["/index.css"]
+            self.assertEqual(html, f'<link href="/b{hashed}"><a href="/b/x">')
+
+    def test_keep_going(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            pages = {
+                "index.md": "# Home",
+                "untitled.md": "no heading here",
+                "blog/broken.md": "---\ntitle: Broken\noops\n---\n# Hi",
+            }
+            for name, md in pages.items():
+                with open(os.path.join(content, name), "w") as f:
+                    f.write(md)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<!--SSG_TARGET-->")
+
+            out = os.path.join(tmp, "out")
+            errors: list[PageError] = []
+            generate_pages(template, content, out, errors=errors)
+            self.assertTrue(os.path.isfile(os.path.join(out, "index.html")))
+            errors.sort()
+            self.assertEqual(
+                [(e.path, e.line) for e in errors],
+                [
+                    (os.path.join(content, "blog", "broken.md"), 3),
+                    (os.path.join(content, "untitled.md"), None),
+                ],
+            )
+            self.assertTrue(str(errors[0]).startswith(f"{errors[0].path}:3: "))
+
+            # without errors= the first failure stops the build
+            with self.assertRaises(Exception):
+                generate_pages(template, content, out)
+
+    def test_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            for i in range(20):
+                with open(os.path.join(content, "blog", f"post{i}.md"), "w") as f:
+                    f.write(f"# Post {i}\n\nsame **boilerplate** [home](/)")
+            with open(os.path.join(content, "broken.md"), "w") as f:
+                f.write("no title")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title><!--SSG_TITLE--></title><!--SSG_TARGET-->")
+
+            # rendered on threads, everything comes out the same and in the same order
+            builds = []
+            for workers in [1, 3]:
+                out = os.path.join(tmp, f"out{workers}")
+                search_index = SearchIndex()
+                errors: list[PageError] = []
+                generate_pages(
+                    template,
+                    content,
+                    out,
+                    fragment_cache=fragment_cache(),
+                    search_index=search_index,
+                    site=Site(),
+                    templates=TemplateCache(),
+                    errors=errors,
+                    workers=workers,
+                )
+                pages = {}
+                for name in os.listdir(os.path.join(out, "blog")):
+                    with open(os.path.join(out, "blog", name)) as f:
+                        pages[name] = f.read()
+                builds.append((pages, search_index.pages, errors))
+            self.assertEqual(len(builds[0][0]), 20)
+            self.assertEqual(len(builds[0][2]), 1)
+            self.assertEqual(builds[0], builds[1])
+
+    def test_variants(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            with open(os.path.join(content, "blog", "post.md"), "w") as f:
+                f.write("# Post\n\n[home](/)")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write('<link href="/index.css"><!--SSG_TARGET-->')
+
+            roots = [os.path.join(tmp, "docs"), os.path.join(tmp, "public")]
+            variants = [
+                Variant("/bdev-ssg/", roots[0], Output(roots[0])),
+                Variant("/", roots[1], Output(roots[1])),
+            ]
+            generate_pages(template, content, roots[0], variants=variants)
+            for root, base_path in zip(roots, ["/bdev-ssg/", "/"]):
+                with open(os.path.join(root, "blog", "post.html")) as f:
+                    self.assertEqual(
+                        f.read(),
+                        f'<link href="{base_path}index.css"><div><h1 id="post">Post</h1>'
+                        + f'<p><a href="{base_path}">home</a></p></div>',
+                    )
+
+    def test_copy_dir_fingerprints_minified_css(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("/* comment */\nbody {\n  color: red;\n}\n")
+            with open(os.path.join(static, "images", "cat.png"), "wb") as f:
+                f.write(b"not really a png")
+
+            out = os.path.join(tmp, "out")
+            assets = Assets(static, hash_names=True)
+            copy_dir(static, out, assets, Minifier())
+            # the fingerprinted css is the minified css, and named for it
+            hashed = assets.asset_url("/index.css")
+            with open(os.path.join(out, "index.css")) as f:
+                minified = f.read()
+            with open(os.path.join(out, hashed.lstrip("/"))) as f:
+                self.assertEqual(f.read(), minified)
+            self.assertNotIn("comment", minified)
+            self.assertIn(content_hash(minified)[:HASH_LENGTH], hashed)
+            # anything else is copied as it is
+            hashed = assets.asset_url("/images/cat.png")
+            with open(os.path.join(out, hashed.lstrip("/")), "rb") as f:
+                self.assertEqual(f.read(), b"not really a png")
+
+    def test_copy_dir_uses_cached_hashes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            os.makedirs(static)
+            path = os.path.join(static, "cat.png")
+            with open(path, "w") as f:
+                f.write("meow")
+
+            out = os.path.join(tmp, "out")
+            assets = Assets(static)
+            h = assets.hash_of(path)
+            output = Output(out)
+            copy_dir(static, out, assets, output=output)
+            # the file was hashed from the cache, not read again
+            self.assertEqual((assets.cache.hits, assets.cache.misses), (1, 1))
+            self.assertEqual(output.files["cat.png"], (4, h))
+
+    def test_listings_link_fingerprinted_assets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            os.makedirs(static)
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {}")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write('<link href="/index.css"><!--SSG_TARGET-->')
+
+            out = os.path.join(tmp, "out")
+            assets = Assets(static, hash_names=True)
+            copy_dir(static, out, assets)
+            site = Site()
+            site.add_page(PageInfo("/blog/post/", "Post", 0))
+            generate_listings(template, out, site, "blog", assets=assets)
+            with open(os.path.join(out, "blog", "index.html")) as f:
+                listing = f.read()
+            hashed = assets.asset_url("/index.css")
+            self.assertNotEqual(hashed, "/index.css")
+            self.assertIn(f'<link href="{hashed}">', listing)
+
+    def test_stream_page(self):
+        md = "# Tom\n\n[home](/) *hi*\n\n\n\n## Old Forest\n\n## Old Forest"
+        out = StringIO()
+        stream_page(StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_fast(md))
+        for src in [StringIO, _Unseekable]:
+            out = StringIO()
+            stream_page(src("---\ntitle: Front\n---\n" + md), out)
+            self.assertEqual(out.getvalue(), markdown_to_html_fast(md))
+            out = StringIO()
+            stream_page(src("text\n" + md), out)
+            self.assertEqual(out.getvalue(), markdown_to_html_fast("text\n" + md))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w") as f:
+                f.write('<title><!--SSG_TITLE--></title><a href="/"><!--SSG_TARGET-->')
+            template = compile_template(template_path)
+            cases = [
+                (StringIO(md), "", "Tom"),
+                (StringIO(md), "Given", "Given"),
+                (StringIO("---\ntitle: Front\n---\n" + md), "Given", "Front"),
+                (StringIO("text\n\n" + md), "", ""),
+                # stdin can't be rewound, but its front matter is read all the same
+                (_Unseekable("---\ntitle: Front\n---\n" + md), "", "Front"),
+                (_Unseekable("text\n\n" + md), "", ""),
+            ]
+            for src, title, expected in cases:
+                out = StringIO()
+                stream_page(src, out, template, title)
+                self.assertTrue(
+                    out.getvalue().startswith(f'<title>{expected}</title><a href="/">'),
+                    out.getvalue(),
+                )
+
+
+class _Unseekable(StringIO):
+    def seekable(self) -> bool:
+        return False
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from templates import TemplateCache, compile_template
+
+
+def write(path: str, text: str):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestTemplates(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        os.makedirs(os.path.join(self.dir, "partials"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def test_render(self):
+        write(
+            self.path("t.html"),
+            "<title><!--SSG_TITLE--></title><!--SSG_TARGET--><!--SSG_TITLE--><!--SSG_",
+        )
+        template = compile_template(self.path("t.html"))
+        self.assertEqual(
+            template.render({"TITLE": "hi", "TARGET": "<p>body</p>"}),
+            "<title>hi</title><p>body</p>hi<!--SSG_",
+        )
+        self.assertTrue(template.has_slot("TITLE"))
+        self.assertFalse(template.has_slot("TOC"))
+        # missing values render as nothing
+        self.assertEqual(template.render({}), "<title></title><!--SSG_")
+
+    def test_unknown_slots_are_kept(self):
+        write(self.path("t.html"), "<title><!--SSG_TITEL--></title><!--SSG_TARGET-->")
+        template = compile_template(self.path("t.html"))
+        self.assertFalse(template.has_slot("TITEL"))
+        self.assertEqual(
+            template.render({"TITLE": "hi", "TARGET": "body"}),
+            "<title><!--SSG_TITEL--></title>body",
+        )
+
+    def test_render_iter(self):
+        write(self.path("t.html"), "<title><!--SSG_TITLE--></title><!--SSG_TARGET-->!")
+        template = compile_template(self.path("t.html"))
+        body = iter(["<p>a</p>", "<p>b</p>"])
+        pieces = template.render_iter({"TITLE": "hi", "TARGET": body})
+        self.assertEqual(next(pieces) + next(pieces), "<title>hi")
+        # the body is only read when the template gets to it
+        self.assertEqual(next(body), "<p>a</p>")
+        self.assertEqual("".join(pieces), "</title><p>b</p>!")
+
+    def test_includes(self):
+        write(self.path("t.html"), "<!--SSG_INCLUDE partials/head.html--><main/>")
+        write(
+            self.path("partials/head.html"), "<head><!--SSG_INCLUDE meta.html--></head>"
+        )
+        write(self.path("partials/meta.html"), "<title><!--SSG_TITLE--></title>")
+        template = compile_template(self.path("t.html"))
+        self.assertEqual(
+            template.render({"TITLE": "hi"}), "<head><title>hi</title></head><main/>"
+        )
+        self.assertEqual(len(template.files), 3)
+
+    def test_include_cycle(self):
+        write(self.path("a.html"), "<!--SSG_INCLUDE b.html-->")
+        write(self.path("b.html"), "<!--SSG_INCLUDE a.html-->")
+        with self.assertRaises(ValueError):
+            compile_template(self.path("a.html"))
+
+    def test_cache_recompiles_when_modified(self):
+        write(self.path("t.html"), "<!--SSG_INCLUDE partials/p.html-->")
+        write(self.path("partials/p.html"), "one")
+        cache = TemplateCache()
+        first = cache.get(self.path("t.html"))
+        self.assertIs(cache.get(self.path("t.html")), first)
+
+        write(self.path("partials/p.html"), "two")
+        os.utime(self.path("partials/p.html"), (0, 12345))
+        self.assertEqual(cache.get(self.path("t.html")).render({}), "two")
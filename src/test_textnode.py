@@ -1,6 +1,6 @@
 import unittest
 
-from htmlnode import LeafNode
+from htmlnode import EMPTY_PROPS, LeafNode
 from textnode import (
     TextNode,
     TextType,
@@ -44,6 +44,12 @@ class TestTextNode(unittest.TestCase):
         for text_node, html_node in cases:
             self.assertEqual(text_node.to_html_node(), html_node)
 
+    def test_to_html_node_shares_empty_props(self):
+        a = TextNode("hello").to_html_node()
+        b = TextNode("world", TextType.BOLD).to_html_node()
+        self.assertIs(a.props, EMPTY_PROPS)
+        self.assertIs(b.props, EMPTY_PROPS)
+
     def test_eq(self):
         cases = [
             (TextNode("hello world"), TextNode("hello world"), True),
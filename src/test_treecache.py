@@ -0,0 +1,65 @@
+import marshal
+import os
+import tempfile
+from unittest import TestCase
+
+from blocknode import Document
+from treecache import TreeCache, dump_document, load_document
+
+MD = """# Tom Bombadil
+
+Why **Tom** was a _mistake_, see [the book](/books/fotr) ![tom](/images/tom.png)
+
+## Old Forest
+
+- one
+- `two`
+
+```
+code **not bold**
+```"""
+
+
+class TestTreeCache(TestCase):
+    def test_round_trip(self):
+        doc = Document(MD)
+        loaded = load_document(dump_document(doc))
+        assert loaded is not None
+        self.assertEqual(loaded.title, doc.title)
+        self.assertEqual(loaded.headings, doc.headings)
+        self.assertEqual(loaded.blocks, doc.blocks)
+        for a, b in zip(loaded.blocks, doc.blocks):
+            self.assertEqual(a.children, b.children)
+            self.assertEqual((a.level, a.id), (b.level, b.id))
+            self.assertEqual(a.to_html_node().to_html(), b.to_html_node().to_html())
+
+    def test_other_versions_are_ignored(self):
+        _version, *rest = marshal.loads(dump_document(Document(MD)))
+        self.assertIsNone(load_document(marshal.dumps(("0", *rest))))
+        self.assertIsNone(load_document(b"not marshal"))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TreeCache(tmp)
+            first = cache.document(MD)
+            self.assertEqual(cache.document(MD).blocks, first.blocks)
+            cache.document("# other")
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+            # only what was asked for survives pruning
+            cache = TreeCache(tmp)
+            cache.document(MD)
+            cache.prune()
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            self.assertEqual(cache.hits, 1)
+
+    def test_prune_leaves_other_files_alone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "notes.tree"))
+            with open(os.path.join(tmp, "notes.md"), "w") as f:
+                f.write("not a cache file")
+            cache = TreeCache(tmp)
+            cache.document(MD)
+            TreeCache(tmp).prune()
+            self.assertEqual(sorted(os.listdir(tmp)), ["notes.md", "notes.tree"])
@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from htmlnode import LeafNode, escape
+from mdparser import markdown_to_html, markdown_to_html_fast, render_markdown
+from urls import (
+    URL_MARK,
+    base_path_resolver,
+    join_marked,
+    mark_url,
+    mark_urls,
+    relative_resolver,
+    resolve_marked,
+    split_marked,
+)
+
+
+class TestUrls(TestCase):
+    def test_mark_url(self):
+        self.assertEqual(mark_url("/x"), f"{URL_MARK}/x{URL_MARK}")
+        for url in ["//cdn/x.js", "https://x", "#top", "x.html"]:
+            self.assertEqual(mark_url(url), url)
+
+    def test_mark_urls(self):
+        html = '<a href="/x" title="/y">/z</a><img src="/a.png"><a href="/unclosed'
+        self.assertEqual(
+            mark_urls(html).replace(URL_MARK, "|"),
+            '<a href="|/x|" title="/y">/z</a><img src="|/a.png|"><a href="/unclosed',
+        )
+
+    def test_split_and_join(self):
+        html = mark_urls('<a href="/x">x</a><img src="/a.png">')
+        parts = split_marked(html, lambda url: url.upper())
+        self.assertEqual(
+            parts, ['<a href="', "/X", '">x</a><img src="', "/A.PNG", '">']
+        )
+        self.assertEqual(
+            join_marked(parts, base_path_resolver("/base/")),
+            '<a href="/base/X">x</a><img src="/base/A.PNG">',
+        )
+        self.assertEqual(resolve_marked("<p>no urls</p>", str.upper), "<p>no urls</p>")
+
+    def test_base_path_resolver(self):
+        resolve = base_path_resolver("/bdev-ssg/")
+        self.assertEqual(resolve("/"), "/bdev-ssg/")
+        self.assertEqual(resolve("/index.css"), "/bdev-ssg/index.css")
+        self.assertEqual(resolve("https://x/y"), "https://x/y")
+
+    def test_relative_resolver(self):
+        cases = [
+            ("/", "/index.css", "index.css"),
+            ("/", "/", "./"),
+            ("/blog/tom/", "/", "../../"),
+            ("/blog/tom/", "/index.css", "../../index.css"),
+            ("/blog/tom/", "/blog/tom/#intro", "./#intro"),
+            ("/blog/tom/", "/blog/glorfindel/?x=1", "../glorfindel/?x=1"),
+            ("/contact.html", "/blog/", "blog/"),
+            ("/blog/tom/", "#top", "#top"),
+        ]
+        for page, url, expected in cases:
+            self.assertEqual(relative_resolver(page)(url), expected, (page, url))
+
+    def test_resolved_while_rendering(self):
+        md = '# [home](/)\n\n![cat](/cat.png) and [x](https://x)\n\n`<a href="/x">`'
+        resolve = base_path_resolver("/base/")
+        html = markdown_to_html_fast(md, resolve)
+        self.assertEqual(html, markdown_to_html(md, resolve))
+        self.assertIn('<a href="/base/">home</a>', html)
+        self.assertIn('<img src="/base/cat.png" alt="cat">', html)
+        self.assertIn('<a href="https://x">x</a>', html)
+        # code samples are text, not attributes, so they're left alone
+        self.assertIn("<code>&lt;a href=&quot;/x&quot;&gt;</code>", html)
+        self.assertNotIn(URL_MARK, html)
+        self.assertIn(URL_MARK, render_markdown(md, resolve=mark_url).html)
+
+    def test_marks_in_content_are_escaped(self):
+        self.assertEqual(escape(f"a{URL_MARK}b"), "a�b")
+        self.assertEqual(LeafNode("p", URL_MARK).to_html(), "<p>�</p>")
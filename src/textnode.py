@@ -1,7 +1,8 @@
 from typing import Callable
 from enums import TextType
 from funcs import pipe
-from htmlnode import LeafNode
+from htmlnode import EMPTY_PROPS, LeafNode, escape
+from urls import UrlResolver, keep_url
 
 
 class TextNode:
@@ -14,27 +15,12 @@ class TextNode:
         self.__ensure_valid()  # raises if not valid
 
     def to_html_node(self) -> LeafNode:
-        tag = None
-        text = self.text
-        props: dict[str, str] = {}
-
-        if self.type == TextType.TEXT:
-            tag = None
-        if self.type == TextType.BOLD:
-            tag = "strong"
-        if self.type == TextType.ITALIC:
-            tag = "em"
-        if self.type == TextType.CODE:
-            tag = "code"
-        if self.type == TextType.LINK and self.url:  # and is for pyright only
-            tag = "a"
-            props = {"href": self.url}
-        if self.type == TextType.IMAGE and self.url:
-            tag = "img"
-            props = {"href": self.url, "alt": self.text}
-            text = ""  # imgs cant have text children, so use an empty string
-
-        return LeafNode(tag, text, props)
+        return _EMITTERS[self.type](self)
+
+    # appends the html for this node to buf, same output as to_html_node().to_html()
+    # without building the LeafNode in between
+    def write_html(self, buf: list[str], resolve: UrlResolver = keep_url) -> None:
+        _WRITERS[self.type](self, buf, resolve)
 
     def __ensure_valid(self) -> None:
         if self.type in (TextType.LINK, TextType.IMAGE) and self.url == None:
@@ -56,6 +42,87 @@ class TextNode:
         return f'TextNode({self.type.value}, "{self.text}")'
 
 
+##### html emitters #####
+
+# one prebuilt emitter per text type, so converting a node is a single dict lookup
+# instead of walking an if chain. tags are shared constants and every node without
+# attributes points at the same empty props mapping instead of allocating a new dict
+
+
+def _emit_plain(node: TextNode) -> LeafNode:
+    return LeafNode(None, node.text, EMPTY_PROPS)
+
+
+def _emit_tag(tag: str) -> Callable[[TextNode], LeafNode]:
+    return lambda node: LeafNode(tag, node.text, EMPTY_PROPS)
+
+
+def _emit_link(node: TextNode) -> LeafNode:
+    if not node.url:  # for pyright only, validated in __init__
+        return _emit_plain(node)
+    return LeafNode("a", node.text, {"href": node.url})
+
+
+def _emit_image(node: TextNode) -> LeafNode:
+    if not node.url:
+        return _emit_plain(node)
+    # imgs cant have text children, so use an empty string
+    return LeafNode("img", "", {"href": node.url, "alt": node.text})
+
+
+_EMITTERS: dict[TextType, Callable[[TextNode], LeafNode]] = {
+    TextType.TEXT: _emit_plain,
+    TextType.BOLD: _emit_tag("strong"),
+    TextType.ITALIC: _emit_tag("em"),
+    TextType.CODE: _emit_tag("code"),
+    TextType.LINK: _emit_link,
+    TextType.IMAGE: _emit_image,
+}
+
+
+# string versions of the emitters above, for rendering straight into a buffer
+
+
+type _Writer = Callable[[TextNode, list[str], UrlResolver], None]
+
+
+def _write_plain(node: TextNode, buf: list[str], _resolve: UrlResolver) -> None:
+    buf.append(escape(node.text))
+
+
+def _write_tag(tag: str) -> _Writer:
+    open_tag, close_tag = f"<{tag}>", f"</{tag}>"
+
+    def write(node: TextNode, buf: list[str], _resolve: UrlResolver) -> None:
+        buf.append(open_tag)
+        buf.append(escape(node.text))
+        buf.append(close_tag)
+
+    return write
+
+
+def _write_link(node: TextNode, buf: list[str], resolve: UrlResolver) -> None:
+    if not node.url:
+        return _write_plain(node, buf, resolve)
+    buf.append(f'<a href="{resolve(escape(node.url))}">{escape(node.text)}</a>')
+
+
+def _write_image(node: TextNode, buf: list[str], resolve: UrlResolver) -> None:
+    if not node.url:
+        return _write_plain(node, buf, resolve)
+    buf.append(f'<img src="{resolve(escape(node.url))}" alt="{escape(node.text)}">')
+
+
+_WRITERS: dict[TextType, _Writer] = {
+    TextType.TEXT: _write_plain,
+    TextType.BOLD: _write_tag("strong"),
+    TextType.ITALIC: _write_tag("em"),
+    TextType.CODE: _write_tag("code"),
+    TextType.LINK: _write_link,
+    TextType.IMAGE: _write_image,
+}
+
+
 ##### utility functions #####
 
 
@@ -87,45 +154,51 @@ def split_nodes_delimiter(
 ) -> list[TextNode]:
     if len(delimiter) == 0:
         return nodes
+    size = len(delimiter)
     new_nodes: list[TextNode] = []
     for n in nodes:
-        start_from = 0  # where in node text where begin to substr from
-        i = 0
-        if len(n.text) < len(delimiter) or n.type is not TextType.TEXT:
+        text = n.text
+        if len(text) < size or n.type is not TextType.TEXT:
             new_nodes.append(n)
             continue
-        while i <= len(n.text) - len(delimiter):
+        last = len(text) - size  # the last index a delimiter can start at
+        start_from = 0  # where in node text where begin to substr from
+        enough = _has_pair(text, delimiter, start_from)
+        i = 0
+        while i <= last:
+            # jump to the next delimiter instead of checking every char
+            i = text.find(delimiter, i)
             # not enough occurrences or reached the end? let's skidaddle
-            if n.text[start_from:].count(delimiter) <= 1 or i >= len(n.text) - len(
-                delimiter
-            ):
-                new_nodes.append(TextNode(n.text[start_from:], n.type))
+            if not enough or i == -1 or i >= last:
+                new_nodes.append(TextNode(text[start_from:], n.type))
                 break
-            if (
-                n.text[i : i + len(delimiter)] == delimiter
-                # do not process adjacent delimiters
-                and n.text[i : i + len(delimiter) * 2] != delimiter * 2
-            ):
-                split_start = i + len(delimiter)  # char right after delimeter
-                split_end = (
-                    n.text[split_start:].find(delimiter) + i + len(delimiter)
-                )  # chars up delimeter
-                # If possible, add any text before the delimiter (excluding it)
-                if (split_start - len(delimiter)) - start_from > 0:
-                    new_nodes.append(
-                        TextNode(
-                            n.text[start_from : split_start - len(delimiter)], n.type
-                        )
-                    )
-                new_nodes.append(TextNode(n.text[split_start:split_end], node_type))
-                # skip to the last delimiter
-                start_from = split_end + len(delimiter)
-                i = start_from
-            else:
+            # do not process adjacent delimiters
+            if text.startswith(delimiter, i + size):
                 i += 1
+                continue
+            split_start = i + size  # char right after delimeter
+            split_end = text.find(delimiter, split_start)  # chars up delimeter
+            if split_end == -1:
+                split_end = split_start - 1
+            # If possible, add any text before the delimiter (excluding it)
+            if i - start_from > 0:
+                new_nodes.append(TextNode(text[start_from:i], n.type))
+            new_nodes.append(TextNode(text[split_start:split_end], node_type))
+            # skip to the last delimiter
+            start_from = split_end + size
+            enough = _has_pair(text, delimiter, start_from)
+            i = start_from
     return new_nodes
 
 
+# whether there are at least two (non overlapping) delimiters in text from start on.
+# stops at the second one, where counting them all would go through the whole rest of
+# the text again after every split
+def _has_pair(text: str, delimiter: str, start: int) -> bool:
+    first = text.find(delimiter, start)
+    return first != -1 and text.find(delimiter, first + len(delimiter)) != -1
+
+
 def split_nodes_links(nodes: list[TextNode]) -> list[TextNode]:
     new_nodes: list[TextNode] = []
 
@@ -134,17 +207,7 @@ def split_nodes_links(nodes: list[TextNode]) -> list[TextNode]:
             new_nodes.append(n)
             continue
 
-        links = extract_markdown_links(n.text)
-        remaining_text = n.text
-        for label, link in links:
-            markdown = f"[{label}]({link})"
-            before, md, after = remaining_text.partition(markdown)
-            if before:
-                new_nodes.append(TextNode(before))
-            new_nodes.append(TextNode(label, TextType.LINK, link))
-            remaining_text = after
-        if remaining_text != "":
-            new_nodes.append(TextNode(remaining_text))
+        _split_at(n.text, "[", extract_markdown_links(n.text), TextType.LINK, new_nodes)
 
     return new_nodes
 
@@ -157,21 +220,35 @@ def split_nodes_images(nodes: list[TextNode]) -> list[TextNode]:
             new_nodes.append(n)
             continue
 
-        images = extract_markdown_images(n.text)
-        remaining_text = n.text
-        for label, link in images:
-            markdown = f"![{label}]({link})"
-            before, md, after = remaining_text.partition(markdown)
-            if before:
-                new_nodes.append(TextNode(before))
-            new_nodes.append(TextNode(label, TextType.IMAGE, link))
-            remaining_text = after
-        if remaining_text != "":
-            new_nodes.append(TextNode(remaining_text))
+        _split_at(
+            n.text, "![", extract_markdown_images(n.text), TextType.IMAGE, new_nodes
+        )
 
     return new_nodes
 
 
+# appends the text around each [label](link) in text (in order) and a node for it.
+# keeps an index into text instead of partitioning what's left after every match,
+# which would copy the rest of the text once per link
+def _split_at(
+    text: str,
+    opening: str,
+    matches: list[tuple[str, str]],
+    node_type: TextType,
+    new_nodes: list[TextNode],
+) -> None:
+    pos = 0
+    for label, link in matches:
+        markdown = f"{opening}{label}]({link})"
+        found = text.find(markdown, pos)
+        if found > pos:
+            new_nodes.append(TextNode(text[pos:found]))
+        new_nodes.append(TextNode(label, node_type, link))
+        pos = found + len(markdown)
+    if pos < len(text):
+        new_nodes.append(TextNode(text[pos:]))
+
+
 # note: not using regex because I do not have a [regex license](https://regexlicensing.org/) ;)
 
 
@@ -227,37 +304,19 @@ def index_of_link(text: str, start_from: int = 0) -> tuple[int, int, int, int] |
     if len(text) < len("[a](b)"):
         return None
 
-    text_start_symbol, text_end_symbol = "[", "]"
-    link_start_symbol, link_end_symbol = "(", ")"
-
-    mid_link = False
-    text_start_index, text_end_index, link_start_index, link_end_index = -1, -1, -1, -1
-    for i, c in enumerate(text[start_from:]):
-        i = i + start_from
-        # look for text start symbol, while ensuring we aren't actually an image
-        # and we don't have an empty text block
-        if not mid_link and c == text_start_symbol:
-            text_start_index = i
-            mid_link = True
-
-        # look for end of text symbol, ensuring the next one is the start of a link
-        if (
-            mid_link
-            and c == text_end_symbol
-            and i < len(text) - 1
-            and text[i + 1] == link_start_symbol
-            and not text_end_index > -1  # stop at first valid end symbol
-        ):
-            text_end_index = i
-            link_start_index = i + 1
-
-        # look for end of link symbol, and extract text and link.
-        if (
-            mid_link
-            and c == link_end_symbol
-            and (text[i - 1] != link_start_symbol)
-            and link_start_index > -1
-        ):
-            link_end_index = i
+    # each symbol is found with str.find from where the last one was, so a page full of
+    # unclosed [ or ]( is still only looked through once
+    text_start_index = text.find("[", start_from)
+    if text_start_index == -1:
+        return None
+    # the first end of text symbol that's right before the start of a link
+    text_end_index = text.find("](", text_start_index + 1)
+    if text_end_index == -1:
+        return None
+    link_start_index = text_end_index + 1
+    # the first end of link symbol that doesn't close an empty ()
+    link_end_index = link_start_index
+    while (link_end_index := text.find(")", link_end_index + 1)) != -1:
+        if text[link_end_index - 1] != "(":
             return (text_start_index, text_end_index, link_start_index, link_end_index)
     return None
@@ -0,0 +1,109 @@
+import marshal
+import os
+
+from blocknode import BlockNode, Document, Heading
+from cache import content_hash
+from enums import BlockType, TextType
+from mdparser import PARSER_VERSION
+from output import write_file
+from textnode import TextNode
+
+# enums are stored by their index in these
+_BLOCK_TYPES = list(BlockType)
+_TEXT_TYPES = list(TextType)
+
+type _Span = tuple[int, str, str | None]  # text type, text, url
+type _Block = tuple[int, str, str, list[list[_Span]], int, str | None]
+
+
+# a parsed document as nothing but tuples, lists, ints and strings, which marshal
+# writes and reads back at C speed. pickling the objects themselves would go through
+# __reduce__ and a class lookup for every TextNode instead
+def dump_document(doc: Document) -> bytes:
+    blocks: list[_Block] = [
+        (
+            _BLOCK_TYPES.index(b.type),
+            b.text,
+            b.cleaned_text,
+            [
+                [(_TEXT_TYPES.index(n.type), n.text, n.url) for n in line]
+                for line in b.children
+            ],
+            b.level,
+            b.id,
+        )
+        for b in doc.blocks
+    ]
+    headings = [tuple(h) for h in doc.headings]
+    return marshal.dumps((PARSER_VERSION, doc.title, blocks, headings))
+
+
+# None if data was written by another version of the parser (or isn't a document)
+def load_document(data: bytes) -> Document | None:
+    try:
+        version, title, blocks, headings = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if version != PARSER_VERSION:
+        return None
+    return Document.restore(
+        [
+            BlockNode.restore(
+                _BLOCK_TYPES[type],
+                text,
+                cleaned_text,
+                [
+                    [TextNode(t, _TEXT_TYPES[tt], url) for tt, t, url in line]
+                    for line in children
+                ],
+                level,
+                id,
+            )
+            for type, text, cleaned_text, children, level, id in blocks
+        ],
+        [Heading(*h) for h in headings],
+        title,
+    )
+
+
+# parsed documents kept on disk by a hash of their markdown, one file each, so an
+# unchanged page is loaded instead of parsed. without a directory it only parses
+class TreeCache:
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.__used: set[str] = set()
+
+    def document(self, md: str) -> Document:
+        if self.directory is None:
+            return Document(md)
+        name = content_hash(md) + ".tree"
+        self.__used.add(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                doc = load_document(f.read())
+        except OSError:
+            doc = None
+        if doc is not None:
+            self.hits += 1
+            return doc
+        self.misses += 1
+        doc = Document(md)
+        write_file(path, dump_document(doc))
+        return doc
+
+    # deletes the documents that weren't asked for since this cache was made,
+    # same as JsonCache.save does with its entries. only .tree files are ever
+    # deleted, anything else in the directory isn't ours
+    def prune(self) -> None:
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if (
+                entry.name.endswith(".tree")
+                and entry.name not in self.__used
+                and entry.is_file(follow_symlinks=False)
+            ):
+                os.remove(entry.path)
@@ -0,0 +1,108 @@
+import posixpath
+from typing import Callable
+
+# takes a url as it's about to be written into an href/src attribute (already
+# escaped) and returns what to write instead, i.e. with a base path in front of it
+type UrlResolver = Callable[[str], str]
+
+# site relative urls are written between a pair of these when their final form isn't
+# known yet (it depends on the base path of each output tree), so finding them again
+# later is a str.split instead of a search through the html. escape() turns any of
+# these in the content itself into U+FFFD, so only urls ever have them
+URL_MARK = "\x00"
+
+# the attributes urls are written in, the only places resolvers are applied
+URL_ATTRIBUTES = ("href", "src")
+
+
+def keep_url(url: str) -> str:
+    return url
+
+
+# /index.css is, //cdn.example.com/x.js, https://..., #top and relative urls aren't
+def is_site_url(url: str) -> bool:
+    return url.startswith("/") and not url.startswith("//")
+
+
+def mark_url(url: str) -> str:
+    return f"{URL_MARK}{url}{URL_MARK}" if is_site_url(url) else url
+
+
+# marks every site relative href="/..." and src="/..." in html that wasn't written
+# with mark_url, like the text of a template
+def mark_urls(html: str) -> str:
+    buf: list[str] = []
+    i = 0
+    while (j := html.find('="/', i)) != -1:
+        url_start = j + 2
+        if html[j - 4 : j] != "href" and html[j - 3 : j] != "src":
+            buf.append(html[i:url_start])
+            i = url_start
+            continue
+        url_end = html.find('"', url_start)
+        if url_end == -1:
+            break
+        buf.append(html[i:url_start])
+        buf.append(mark_url(html[url_start:url_end]))
+        i = url_end
+    buf.append(html[i:])
+    return "".join(buf)
+
+
+# html split around its marked urls, every odd part is a url already run through resolve
+def split_marked(html: str, resolve: UrlResolver = keep_url) -> list[str]:
+    parts = html.split(URL_MARK)
+    if resolve is not keep_url:
+        parts[1::2] = map(resolve, parts[1::2])
+    return parts
+
+
+# joins what split_marked gave back, running each url through resolve
+def join_marked(parts: list[str], resolve: UrlResolver = keep_url) -> str:
+    if len(parts) == 1:
+        return parts[0]
+    buf = parts.copy()
+    if resolve is not keep_url:
+        buf[1::2] = map(resolve, buf[1::2])
+    return "".join(buf)
+
+
+def resolve_marked(html: str, resolve: UrlResolver = keep_url) -> str:
+    if URL_MARK not in html:
+        return html
+    return join_marked(html.split(URL_MARK), resolve)
+
+
+# /index.css -> /bdev-ssg/index.css
+def base_path_resolver(base_path: str) -> UrlResolver:
+    if base_path == "/":
+        return keep_url
+
+    def resolve(url: str) -> str:
+        return base_path + url[1:] if is_site_url(url) else url
+
+    return resolve
+
+
+# /index.css -> ../../index.css for a page served at /blog/tom/, so the output works
+# under any base path (or straight off the filesystem)
+def relative_resolver(page_url: str) -> UrlResolver:
+    page_dir = page_url if page_url.endswith("/") else posixpath.dirname(page_url)
+
+    def resolve(url: str) -> str:
+        if not is_site_url(url):
+            return url
+        end = len(url)
+        for c in "?#":
+            i = url.find(c)
+            if i != -1:
+                end = min(end, i)
+        path, rest = url[:end], url[end:]
+        rel_path = posixpath.relpath(path, page_dir)
+        if rel_path == ".":
+            return "./" + rest
+        if path.endswith("/"):
+            rel_path += "/"
+        return rel_path + rest
+
+    return resolve